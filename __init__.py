@@ -1,5 +1,5 @@
 """
 A dashboard for managing writing projects
 """
-import settings
+from . import settings
 from .writersDashboard import *
\ No newline at end of file
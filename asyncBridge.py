@@ -0,0 +1,214 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Lets coroutines be published to htmlui as if they were
+ordinary synchronous callbacks.
+
+htmlui calls published functions on its ui thread and waits for them,
+so anything slow freezes the ui.  Here, coroutines run on an asyncio loop
+in a thread of its own.  A call that finishes quickly is answered right
+away.  One that doesn't is answered with nothing for now, and its
+Javascript is handed over later through pollPending(), which the page
+calls periodically.
+"""
+import typing
+import threading
+import collections
+import concurrent.futures
+import functools
+import inspect
+if typing.TYPE_CHECKING:
+    import asyncio
+    import htmlui
+
+
+class AsyncBridge:
+    """
+    Lets coroutines be published to htmlui as if they were
+    ordinary synchronous callbacks.
+    """
+
+    def __init__(self,waitTimeout:float=0.05):
+        """
+        :param waitTimeout: how many seconds a call may take before
+            the ui stops waiting for it and gets the result later
+        """
+        self.waitTimeout:float=waitTimeout
+        self.loop:typing.Optional['asyncio.AbstractEventLoop']=None
+        self._thread:typing.Optional[threading.Thread]=None
+        # one worker, so that background jobs never trip over each other
+        self._worker:concurrent.futures.ThreadPoolExecutor=\
+            concurrent.futures.ThreadPoolExecutor(
+                max_workers=1,thread_name_prefix='dashboardWorker')
+        self._pending:typing.Deque[str]=collections.deque()
+
+    def start(self)->None:
+        """
+        start the event loop thread
+        """
+        import asyncio
+        if self._thread is not None:
+            return
+        self.loop=asyncio.new_event_loop()
+        started=threading.Event()
+
+        def runLoop():
+            asyncio.set_event_loop(self.loop)
+            self.loop.call_soon(started.set)
+            self.loop.run_forever()
+
+        self._thread=threading.Thread(target=runLoop,name='dashboardLoop')
+        self._thread.start()
+        started.wait()
+
+    def shutdown(self)->None:
+        """
+        cancel anything still running, then stop and join all threads
+        """
+        import asyncio
+        if self._thread is None:
+            return
+
+        async def cancelAll():
+            tasks=[t for t in asyncio.all_tasks()
+                if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks,return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(cancelAll(),self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        self._worker.shutdown(wait=True,cancel_futures=True)
+        self._thread=None
+        self.loop=None
+
+    async def inBackground(self,fn:typing.Callable,*args,**kwargs)->typing.Any:
+        """
+        run a slow, blocking function (disk access, etc) on the
+        background worker without blocking the event loop
+        """
+        import asyncio
+        loop=asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._worker,functools.partial(fn,*args,**kwargs))
+
+    def submit(self,coro:typing.Coroutine)->concurrent.futures.Future:
+        """
+        run a coroutine on the event loop from any thread
+        """
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(coro,self.loop)
+
+    def _deliverLater(self,future:concurrent.futures.Future)->None:
+        """
+        queue up the Javascript of a call that took too long
+        """
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            print('ERR:',future.exception())
+            return
+        result=future.result()
+        if result:
+            self._pending.append(str(result))
+
+    def deliverLater(self,coro:typing.Coroutine)->concurrent.futures.Future:
+        """
+        run a coroutine on the event loop, with the Javascript it
+        returns going to the ui through pollPending() once it is done
+        """
+        future=self.submit(coro)
+        future.add_done_callback(self._deliverLater)
+        return future
+
+    def wrap(self,fn:typing.Callable,name:str=None)->typing.Callable:
+        """
+        wrap a coroutine function into a synchronous callback
+        that never blocks the ui for longer than waitTimeout
+        """
+        import htmlui
+
+        @functools.wraps(fn)
+        def wrapper(*args,**kwargs)->'htmlui.Javascript':
+            future=self.submit(fn(*args,**kwargs))
+            try:
+                return future.result(timeout=self.waitTimeout)
+            except concurrent.futures.TimeoutError:
+                future.add_done_callback(self._deliverLater)
+                return htmlui.Javascript()
+
+        if name is not None:
+            wrapper.__name__=name
+        return wrapper
+
+    def publish(self,
+        ui:'htmlui.HtmlUI',
+        fn:typing.Callable,
+        name:str=None
+        )->None:
+        """
+        publish a function to the ui
+
+        coroutine functions are wrapped so they run on the event loop,
+        everything else is published as-is
+
+        :param name: name to publish it under (default is the function name)
+        """
+        if inspect.iscoroutinefunction(fn):
+            fn=self.wrap(fn,name)
+        elif name is not None:
+            original=fn
+
+            @functools.wraps(original)
+            def renamed(*args,**kwargs):
+                return original(*args,**kwargs)
+
+            renamed.__name__=name
+            fn=renamed
+        ui.publish(fn)
+
+    def pollPending(self)->'htmlui.Javascript':
+        """
+        get the Javascript of any slow calls that have finished since
+        the last time this was called
+
+        (the ui calls this periodically)
+        """
+        import htmlui
+        code=[]
+        while self._pending:
+            code.append(self._pending.popleft())
+        return htmlui.Javascript('\n'.join(code))
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  asyncBridge.py [options]')
+        print('Options:')
+        print('   NONE')
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
@@ -0,0 +1,548 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the dashboard
+
+Generates synthetic catalogs (settings.ini, stageInfo.csv, projects.csv)
+along with a fake directory tree of manuscripts at whatever scales are
+asked for, times the things that matter, and records the results as
+json so that runs from different versions can be compared.
+"""
+import typing
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import datetime
+import platform
+import tempfile
+import collections
+if typing.TYPE_CHECKING:
+    from .writersDashboard import Dashboard
+
+
+WRITING_EXTENSIONS:typing.Tuple[str,...]=('msk','celtx','odt','doc','docx')
+NOISE_EXTENSIONS:typing.Tuple[str,...]=(
+    'jpg','png','psd','bak','txt','pdf','tmp')
+WORDS:typing.Tuple[str,...]=(
+    'Dragon','Tide','Storm','Shadow','Glass','Ember','River','Crown',
+    'Winter','Iron','Hollow','Star','Silent','Raven','Ash','Gate')
+
+
+def generateSettings(
+    directory:str,
+    projectsDirectory:str,
+    scanMaxDepth:int=2
+    )->str:
+    """
+    write a settings.ini
+
+    returns its location
+    """
+    location=os.path.join(directory,'settings.ini')
+    with open(location,'w',encoding='utf-8') as f:
+        f.write('workingHoursPerDayPerBook=6\n')
+        f.write('workingDaysPerWeek=6\n')
+        f.write('targetWordcount=60000\n')
+        f.write('workingHoursPerDay=6\n')
+        f.write('simultaneousBooks=1\n')
+        f.write('projectsDirectory='+projectsDirectory+'\n')
+        f.write('writingApp=manuskript\n')
+        f.write('scanMaxDepth='+str(scanMaxDepth)+'\n')
+    return location
+
+
+def generateStageInfo(directory:str,numStages:int=12)->str:
+    """
+    write a stageInfo.csv
+
+    returns its location
+    """
+    location=os.path.join(directory,'stageInfo.csv')
+    with open(location,'w',encoding='utf-8') as f:
+        f.write('stageNum,name,estimateWorkingDays,estimateWorkingHours,goal\n') # noqa: E501 # pylint: disable=line-too-long
+        for i in range(numStages):
+            f.write(f'{i},Stage {i},{i%5+1},{i%3*4},goal of stage {i}\n')
+    return location
+
+
+def _title(rng:random.Random,i:int)->str:
+    return ' '.join(rng.sample(WORDS,2))+' '+str(i)
+
+
+def generateTree(
+    root:str,
+    count:int,
+    depth:int=1,
+    seriesSize:int=5,
+    noiseFiles:int=10,
+    seed:int=0
+    )->typing.List[typing.Tuple[str,str,str]]:
+    """
+    create a fake writing folder full of manuscripts
+
+    :param count: how many projects to create
+    :param depth: how many levels of series folders the projects
+        are nested in (0 means directly in root)
+    :param seriesSize: how many projects per innermost series
+    :param noiseFiles: how many non-manuscript files (images, backups, etc)
+        to put next to each manuscript
+
+    returns [(title,series,documentLocation)]
+    """
+    rng=random.Random(seed)
+    ret=[]
+    seriesPath:typing.List[str]=[]
+    seriesName=''
+    for i in range(count):
+        if depth>0 and i%seriesSize==0:
+            group=i//seriesSize
+            seriesPath=[f'Series{group}Level{level}' for level in range(depth)]
+            seriesName=seriesPath[-1]
+        title=_title(rng,i)
+        directory=os.path.join(root,*seriesPath,title.replace(' ',''))
+        os.makedirs(directory,exist_ok=True)
+        ext=rng.choice(WRITING_EXTENSIONS)
+        documentLocation=os.path.join(directory,title.replace(' ','')+'.'+ext) # noqa: E501 # pylint: disable=line-too-long
+        with open(documentLocation,'wb') as f:
+            f.write(os.urandom(rng.randint(64,4096)))
+        for j in range(noiseFiles):
+            noise=os.path.join(directory,f'noise{j}.'+rng.choice(NOISE_EXTENSIONS)) # noqa: E501 # pylint: disable=line-too-long
+            with open(noise,'wb') as f:
+                f.write(b'x'*rng.randint(0,256))
+        ret.append((title,seriesName,documentLocation))
+    return ret
+
+
+def generateProjects(
+    directory:str,
+    tree:typing.List[typing.Tuple[str,str,str]],
+    numStages:int=12,
+    blockedFraction:float=0.1,
+    seed:int=0
+    )->str:
+    """
+    write a projects.csv for a generated tree
+
+    returns its location
+    """
+    from .projects import Project
+    rng=random.Random(seed)
+    location=os.path.join(directory,'projects.csv')
+    today=datetime.date.today()
+    with open(location,'w',encoding='utf-8') as f:
+        f.write(','.join(Project.SAVE_FIELDS)+'\n')
+        for i,(title,series,documentLocation) in enumerate(tree):
+            blockedBy=''
+            if i>0 and rng.random()<blockedFraction:
+                blockedBy=tree[rng.randrange(i)][0]
+            desiredETA=today+datetime.timedelta(days=rng.randint(-30,720))
+            f.write(','.join((
+                str(rng.randint(1,20)),
+                rng.choice(('active','active','planned','shelved')),
+                title,
+                series,
+                str(rng.choice((40000,60000,90000))),
+                str(rng.randint(0,60000)),
+                str(rng.randrange(numStages)),
+                str(round(rng.random(),2)),
+                desiredETA.strftime('%m/%d/%y'),
+                blockedBy,
+                documentLocation))+'\n')
+    return location
+
+
+class Benchmark:
+    """
+    Times things at several scales and keeps track of the results
+    """
+
+    def __init__(self,repeats:int=3):
+        self.repeats:int=repeats
+        self.results:typing.List[typing.Dict[str,typing.Any]]=[]
+
+    def time(self,
+        name:str,
+        scale:int,
+        fn:typing.Callable[[],typing.Any],
+        calls:int=1
+        )->typing.Optional[float]:
+        """
+        time a function, keeping the best of self.repeats runs
+
+        :param calls: how many times to call fn per run
+            (for things too quick to time individually)
+
+        returns the best time per call in seconds
+            or None if it could not be run
+        """
+        times=[]
+        try:
+            for _ in range(self.repeats):
+                start=time.perf_counter()
+                for _ in range(calls):
+                    fn()
+                times.append((time.perf_counter()-start)/calls)
+        except ImportError as e:
+            print(f'  {name}: skipped ({e})')
+            return None
+        times.sort()
+        result={
+            'name':name,
+            'scale':scale,
+            'best':times[0],
+            'median':times[len(times)//2],
+            'repeats':self.repeats,
+            'calls':calls}
+        self.results.append(result)
+        print(f'  {name}: {times[0]*1000:.3f}ms')
+        return times[0]
+
+    def save(self,location:str)->None:
+        """
+        save results as json
+        """
+        data={
+            'date':datetime.datetime.now().isoformat(),
+            'python':sys.version,
+            'platform':platform.platform(),
+            'results':self.results}
+        with open(location,'w',encoding='utf-8') as f:
+            json.dump(data,f,indent=2)
+
+    def compare(self,
+        location:str,
+        threshold:float=1.25
+        )->typing.List[str]:
+        """
+        compare against a previous run
+
+        returns a description of everything that got slower
+        than threshold times its previous best
+        """
+        with open(location,'r',encoding='utf-8') as f:
+            previous=json.load(f)
+        before={(r['name'],r['scale']):r['best'] for r in previous['results']} # noqa: E501 # pylint: disable=line-too-long
+        regressions=[]
+        for r in self.results:
+            old=before.get((r['name'],r['scale']))
+            if old and r['best']>old*threshold:
+                regressions.append(
+                    f"{r['name']} @{r['scale']}: {old*1000:.3f}ms -> {r['best']*1000:.3f}ms") # noqa: E501 # pylint: disable=line-too-long
+        return regressions
+
+
+class _CountingEntry:
+    """
+    wraps an os.DirEntry to count the calls that may hit the disk
+    """
+
+    def __init__(self,entry:os.DirEntry,counts:typing.Counter[str]):
+        self._entry:os.DirEntry=entry
+        self._counts:typing.Counter[str]=counts
+
+    def __getattr__(self,name:str)->typing.Any:
+        return getattr(self._entry,name)
+
+    def is_file(self,*args,**kwargs)->bool:
+        """ counted (though it is usually free on linux and windows) """
+        self._counts['DirEntry.is_file']+=1
+        return self._entry.is_file(*args,**kwargs)
+
+    def is_dir(self,*args,**kwargs)->bool:
+        """ counted (though it is usually free on linux and windows) """
+        self._counts['DirEntry.is_dir']+=1
+        return self._entry.is_dir(*args,**kwargs)
+
+    def stat(self,*args,**kwargs)->os.stat_result:
+        """ counted """
+        self._counts['DirEntry.stat']+=1
+        return self._entry.stat(*args,**kwargs)
+
+
+class _CountingScandir:
+    """
+    wraps os.scandir to hand out counting entries
+    """
+
+    def __init__(self,it,counts:typing.Counter[str]):
+        self._it=it
+        self._counts:typing.Counter[str]=counts
+
+    def __iter__(self):
+        for entry in self._it:
+            yield _CountingEntry(entry,self._counts)
+
+    def __enter__(self)->'_CountingScandir':
+        return self
+
+    def __exit__(self,*args)->None:
+        self.close()
+
+    def close(self)->None:
+        """ close the underlying scandir """
+        self._it.close()
+
+
+class SyscallCounter:
+    """
+    Counts the os calls that hit the disk while it is in effect
+        with SyscallCounter() as counter:
+            ...
+        print(counter.counts)
+
+    (os.path.isfile, getmtime and friends all end up in os.stat,
+    so they are counted as such)
+    """
+
+    def __init__(self):
+        self.counts:typing.Counter[str]=collections.Counter()
+        self._originals:typing.Dict[str,typing.Callable]={}
+
+    @property
+    def total(self)->int:
+        """
+        all counted calls, except DirEntry.is_file/is_dir
+        (which normally come for free with the directory listing)
+        """
+        return sum(v for k,v in self.counts.items()
+            if k not in ('DirEntry.is_file','DirEntry.is_dir'))
+
+    def __enter__(self)->'SyscallCounter':
+        counts=self.counts
+        for name in ('stat','lstat','listdir','scandir'):
+            original=getattr(os,name)
+            self._originals[name]=original
+
+            def counted(*args,_name=name,_original=original,**kwargs):
+                counts['os.'+_name]+=1
+                ret=_original(*args,**kwargs)
+                if _name=='scandir':
+                    ret=_CountingScandir(ret,counts)
+                return ret
+
+            setattr(os,name,counted)
+        return self
+
+    def __exit__(self,*args)->None:
+        for name,original in self._originals.items():
+            setattr(os,name,original)
+        self._originals={}
+
+
+def legacyDirectoryLooksLikeProject(directory:str)->typing.Optional[str]:
+    """
+    the manuscript selection as it used to be done,
+    kept as a baseline to compare against
+    """
+    foundFile=None
+    foundPriority=1000
+    writingFileExtensions=(
+        'msk','celtx','odt','doc','docx') # in priority order!
+    for filename in os.listdir(directory):
+        fullPath=directory+os.sep+filename # make it into a full path
+        if not os.path.isfile(fullPath):
+            continue
+        ext=filename.rsplit('.',1)
+        if len(ext)<2:
+            continue
+        try:
+            idx=writingFileExtensions.index(ext[1])
+        except ValueError:
+            continue
+        if idx<foundPriority:
+            foundFile=fullPath
+            foundPriority=idx
+        elif idx==foundPriority:
+            if os.path.getmtime(foundFile)<os.path.getmtime(fullPath):
+                foundFile=fullPath
+    return foundFile
+
+
+def generateBigFolder(
+    directory:str,
+    noiseFiles:int=2000,
+    manuscripts:int=20,
+    seed:int=0
+    )->str:
+    """
+    create a single project folder stuffed with images, backups,
+    and a pile of versions of the same manuscript
+
+    returns the folder
+    """
+    rng=random.Random(seed)
+    folder=os.path.join(directory,'BigProject')
+    os.makedirs(folder,exist_ok=True)
+    for i in range(noiseFiles):
+        ext=rng.choice(NOISE_EXTENSIONS)
+        with open(os.path.join(folder,f'research{i}.{ext}'),'wb') as f:
+            f.write(b'x')
+    for i in range(manuscripts):
+        with open(os.path.join(folder,f'BigProject-v{i}.docx'),'wb') as f:
+            f.write(b'x')
+        os.utime(os.path.join(folder,f'BigProject-v{i}.docx'),
+            (1000000+rng.randrange(100000),)*2)
+    for i in range(noiseFiles//100):
+        os.makedirs(os.path.join(folder,f'images{i}.docx.d'),exist_ok=True)
+    return folder
+
+
+def benchmarkDirectorySelection(
+    benchmark:Benchmark,
+    noiseFiles:int=2000,
+    manuscripts:int=20
+    )->None:
+    """
+    compare how many os calls it takes to pick the manuscript out of
+    one big folder, the old way and the current way
+    """
+    from .writersDashboard import Dashboard
+    print(f'Picking the manuscript out of {noiseFiles} other files:')
+    directory=tempfile.mkdtemp(prefix='writersDashboardBench')
+    try:
+        folder=generateBigFolder(directory,noiseFiles,manuscripts)
+        d=Dashboard(
+            generateSettings(directory,directory),
+            generateStageInfo(directory),
+            generateProjects(directory,[]))
+        projects=d.projects
+        for name,fn in (
+            ('legacyDirectoryLooksLikeProject',
+                lambda:legacyDirectoryLooksLikeProject(folder)),
+            ('directoryLooksLikeProject',
+                lambda:projects._directoryLooksLikeProject(folder)) # pylint: disable=protected-access # noqa: E501
+            ):
+            #
+            with SyscallCounter() as counter:
+                fn()
+            benchmark.time(name,noiseFiles,fn)
+            benchmark.results[-1]['syscalls']=counter.total
+            benchmark.results[-1]['syscallsByName']=dict(counter.counts)
+            print(f'    {counter.total} os calls: {dict(counter.counts)}')
+    finally:
+        shutil.rmtree(directory,ignore_errors=True)
+
+
+def makeCatalog(
+    directory:str,
+    scale:int,
+    depth:int=1,
+    noiseFiles:int=10
+    )->'Dashboard':
+    """
+    generate a complete synthetic catalog and return a
+    (not yet loaded) Dashboard for it
+    """
+    from .writersDashboard import Dashboard
+    projectsDirectory=os.path.join(directory,'literature')
+    tree=generateTree(projectsDirectory,scale,depth,noiseFiles=noiseFiles)
+    return Dashboard(
+        generateSettings(directory,projectsDirectory,depth+1),
+        generateStageInfo(directory),
+        generateProjects(directory,tree))
+
+
+def benchmarkScale(
+    benchmark:Benchmark,
+    scale:int,
+    depth:int=1,
+    noiseFiles:int=10
+    )->None:
+    """
+    run all benchmarks against a synthetic catalog of a given size
+    """
+    from .writersDashboard import Dashboard
+    print(f'{scale} projects:')
+    directory=tempfile.mkdtemp(prefix='writersDashboardBench')
+    try:
+        d=makeCatalog(directory,scale,depth,noiseFiles)
+        benchmark.time('loadSettings',scale,lambda:d.settings.loadSettings(d.settingsLocation)) # noqa: E501 # pylint: disable=line-too-long
+        benchmark.time('loadStageInfos',scale,lambda:d.stageInfo.loadStageInfos(d.stageInfoLocation)) # noqa: E501 # pylint: disable=line-too-long
+        benchmark.time('loadProjects',scale,lambda:d.projects.loadProjects(d.projectsLocation)) # noqa: E501 # pylint: disable=line-too-long
+        benchmark.time('scanProjects',scale,d.projects.scanProjects)
+        benchmark.time('top',scale,lambda:d.projects.top(4))
+        titles=iter([p.title for p in d.projects][0:100]*benchmark.repeats)
+        benchmark.time('getByName',scale,
+            lambda:d.projects.getByName(next(titles)),
+            calls=min(100,scale))
+        benchmark.time('getHtmlControl',scale,d.getHtmlControl)
+        saveTo=os.path.join(directory,'saved.csv')
+        benchmark.time('saveProjects',scale,lambda:d.projects.saveProjects(saveTo)) # noqa: E501 # pylint: disable=line-too-long
+        fresh=Dashboard(d.settingsLocation,d.stageInfoLocation,d.projectsLocation) # noqa: E501 # pylint: disable=line-too-long
+        benchmark.time('coldTop',scale,lambda:(fresh.topSnapshot.invalidate(),fresh.topLines(4))) # noqa: E501 # pylint: disable=line-too-long
+        benchmark.time('snapshotTop',scale,lambda:fresh.topLines(4))
+    finally:
+        shutil.rmtree(directory,ignore_errors=True)
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    scales=[100,1000,10000]
+    depth=1
+    noiseFiles=10
+    repeats=3
+    out=None
+    compareTo=None
+    run=False
+    for arg in args:
+        if arg.startswith('-'):
+            kv=[a.strip() for a in arg.split('=',1)]
+            if kv[0] in ['-h','--help']:
+                printhelp=True
+            elif kv[0]=='--scales':
+                scales=[int(x) for x in kv[1].split(',')]
+            elif kv[0]=='--depth':
+                depth=int(kv[1])
+            elif kv[0]=='--noise':
+                noiseFiles=int(kv[1])
+            elif kv[0]=='--repeats':
+                repeats=int(kv[1])
+            elif kv[0]=='--out':
+                out=kv[1]
+            elif kv[0]=='--compare':
+                compareTo=kv[1]
+            elif kv[0]=='--run':
+                run=True
+            else:
+                print('ERR: unknown argument "'+kv[0]+'"')
+        else:
+            print('ERR: unknown argument "'+arg+'"')
+    if not run:
+        printhelp=True
+    if printhelp:
+        print('Usage:')
+        print('  benchmark.py [options]')
+        print('Options:')
+        print('   --run ................ run the benchmarks')
+        print('   --scales=n[,n...] .... how many projects to generate (default=100,1000,10000)') # noqa: E501 # pylint: disable=line-too-long
+        print('   --depth=n ............ how deeply series folders are nested (default=1)') # noqa: E501 # pylint: disable=line-too-long
+        print('   --noise=n ............ non-manuscript files per project folder (default=10)') # noqa: E501 # pylint: disable=line-too-long
+        print('   --repeats=n .......... runs of each benchmark, keeping the best (default=3)') # noqa: E501 # pylint: disable=line-too-long
+        print('   --out=file.json ...... save the results') # noqa: E501 # pylint: disable=line-too-long
+        print('   --compare=file.json .. report anything slower than a previous run') # noqa: E501 # pylint: disable=line-too-long
+        return 0
+    benchmark=Benchmark(repeats)
+    for scale in scales:
+        benchmarkScale(benchmark,scale,depth,noiseFiles)
+    benchmarkDirectorySelection(benchmark)
+    if out is not None:
+        benchmark.save(out)
+    if compareTo is not None:
+        regressions=benchmark.compare(compareTo)
+        for regression in regressions:
+            print('SLOWER:',regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__=='__main__':
+    sys.exit(cmdline(sys.argv[1:]))
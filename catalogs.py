@@ -0,0 +1,221 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Several independent catalogs of projects (one per writer, say)
+
+Each catalog is a directory of its own under a catalogs directory:
+    catalogs/
+        stageInfo.csv       <- optional, shared by any catalog without one
+        settings.ini        <- optional, likewise
+        alice/
+            settings.ini
+            stageInfo.csv
+            projects.csv
+        bob/
+            projects.csv
+
+Catalogs are only found by looking at directory names, and each one is
+only loaded once something actually asks it a question.  Questions
+spanning several catalogs (like a studio-wide --top) use each catalog's
+precomputed snapshot when it is up to date, so catalogs that haven't
+changed are never loaded at all.
+"""
+import typing
+import os
+import fnmatch
+import heapq
+import itertools
+if typing.TYPE_CHECKING:
+    from WritersDashboard.writersDashboard import Dashboard
+
+
+CATALOG_FILES:typing.Tuple[str,str,str]=(
+    'settings.ini','stageInfo.csv','projects.csv')
+
+
+class Catalog:
+    """
+    A single named catalog, with its own settings, stages and projects
+    """
+
+    def __init__(self,name:str,directory:str,sharedDirectory:str=None):
+        """
+        :param sharedDirectory: where to look for settings.ini and
+            stageInfo.csv if the catalog doesn't have its own
+        """
+        self.name:str=name
+        self.directory:str=directory
+        self.sharedDirectory:typing.Optional[str]=sharedDirectory
+        self._dashboard:typing.Optional['Dashboard']=None
+
+    def _location(self,filename:str)->str:
+        """
+        the catalog's own file if it has one, otherwise the shared one
+        """
+        location=os.path.join(self.directory,filename)
+        if self.sharedDirectory is not None and not os.path.exists(location):
+            shared=os.path.join(self.sharedDirectory,filename)
+            if os.path.exists(shared):
+                return shared
+        return location
+
+    @property
+    def dashboard(self)->'Dashboard':
+        """
+        the dashboard for this catalog
+
+        (which itself loads nothing until it is used)
+        """
+        if self._dashboard is None:
+            from WritersDashboard.writersDashboard import Dashboard
+            settingsFile,stageInfoFile,projectsFile=CATALOG_FILES
+            self._dashboard=Dashboard(
+                self._location(settingsFile),
+                self._location(stageInfoFile),
+                os.path.join(self.directory,projectsFile))
+        return self._dashboard
+
+    @property
+    def loaded(self)->bool:
+        """
+        have this catalog's projects been loaded?
+        """
+        return self._dashboard is not None and self._dashboard.loaded
+
+    def __repr__(self)->str:
+        return self.name
+
+
+class Catalogs:
+    """
+    All of the catalogs in a catalogs directory
+    """
+
+    def __init__(self,directory:str='catalogs'):
+        self.directory:str=directory
+        self._catalogs:typing.Optional[typing.Dict[str,Catalog]]=None
+
+    @property
+    def catalogs(self)->typing.Dict[str,Catalog]:
+        """
+        {name:Catalog} of every subdirectory holding a projects.csv
+        (found on first use, without loading any of them)
+        """
+        if self._catalogs is None:
+            projectsFile=CATALOG_FILES[2]
+            found={}
+            try:
+                entries=os.scandir(self.directory)
+            except OSError:
+                entries=None
+            if entries is not None:
+                with entries:
+                    for entry in entries:
+                        if entry.is_dir() and os.path.exists(
+                            os.path.join(entry.path,projectsFile)):
+                            #
+                            found[entry.name]=Catalog(
+                                entry.name,entry.path,self.directory)
+            self._catalogs={name:found[name] for name in sorted(found)}
+        return self._catalogs
+
+    def names(self)->typing.List[str]:
+        """
+        the names of all catalogs
+        """
+        return list(self.catalogs)
+
+    def select(self,pattern:str='*')->typing.List[Catalog]:
+        """
+        the catalogs matching a pattern
+
+        :param pattern: a name, a wildcard like "*" or "a*", or several
+            of those separated by commas
+        """
+        ret=[]
+        for part in pattern.split(','):
+            part=part.strip()
+            if not part:
+                continue
+            matched=fnmatch.filter(self.catalogs,part)
+            if not matched:
+                raise Exception('No catalog matching "'+part+'" in '+self.directory) # noqa: E501 # pylint: disable=line-too-long
+            for name in matched:
+                if self.catalogs[name] not in ret:
+                    ret.append(self.catalogs[name])
+        return ret
+
+    def topLines(self,n:int=4,pattern:str='*')->typing.List[str]:
+        """
+        the --top todo list across several catalogs, with the most
+        urgent projects of all of them first
+
+        Each catalog gives its own top n (from its snapshot if that is
+        up to date) and those are merged, so nothing is sorted as a whole.
+        """
+        def scored(catalog:Catalog)->typing.Iterator[typing.Tuple[float,str]]:
+            for score,line in catalog.dashboard.topScored(n):
+                yield score,catalog.name+': '+line
+
+        merged=heapq.merge(
+            *(scored(catalog) for catalog in self.select(pattern)),
+            key=lambda item:item[0])
+        return [line for _,line in itertools.islice(merged,n)]
+
+    def queryLines(self,query:str,pattern:str='*')->typing.List[str]:
+        """
+        the projects matching a query, catalog by catalog
+        """
+        ret=[]
+        for catalog in self.select(pattern):
+            dashboard=catalog.dashboard
+            for line in dashboard.formatTop(dashboard.projects.query(query)):
+                ret.append(catalog.name+': '+line)
+        return ret
+
+    def __len__(self)->int:
+        return len(self.catalogs)
+
+    def __iter__(self)->typing.Iterator[Catalog]:
+        return iter(self.catalogs.values())
+
+    def __repr__(self)->str:
+        return '\n'.join(self.catalogs)
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    catalogs=Catalogs()
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                elif kv[0]=='--catalogs':
+                    catalogs=Catalogs(kv[1])
+                elif kv[0]=='--list':
+                    for name in catalogs.names():
+                        print(name)
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  catalogs.py [options]')
+        print('Options:')
+        print('   --catalogs=directory . where the catalogs are (default="catalogs")') # noqa: E501 # pylint: disable=line-too-long
+        print('   --list ............... list the catalogs')
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
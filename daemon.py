@@ -0,0 +1,407 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+A long-running dashboard that keeps everything loaded and
+answers queries over a local unix socket
+
+The protocol is one json object per line, both ways.
+    request:  {"cmd":"top","args":{"n":4}}
+    response: {"ok":true,"result":[...]}
+          or: {"ok":false,"error":"Unable to find matching project."}
+"""
+import typing
+import os
+import json
+import socket
+import functools
+if typing.TYPE_CHECKING:
+    from WritersDashboard.writersDashboard import Dashboard
+    from WritersDashboard.projects import Projects
+
+
+# how the error for a command the daemon doesn't have begins
+# (daemons from older versions send it too, so it mustn't change)
+UNKNOWN_COMMAND:str='Unknown command'
+
+
+def _jsonDefault(o:typing.Any)->typing.Any:
+    """
+    json-encode the things json doesn't know about (mostly datetimes)
+    """
+    if hasattr(o,'isoformat'):
+        return o.isoformat()
+    return str(o)
+
+
+def encode(obj:typing.Any)->bytes:
+    """
+    encode a single protocol message
+    """
+    return json.dumps(obj,default=_jsonDefault).encode('utf-8')+b'\n'
+
+
+class DashboardDaemon:
+    """
+    Keeps a Dashboard hot in memory and serves it to any number
+    of concurrent clients.
+
+    If any of the input files are changed behind our back,
+    everything is reloaded before the next answer.
+    """
+
+    def __init__(self,dashboard:'Dashboard',socketLocation:str=None):
+        import asyncio
+        from WritersDashboard.snapshot import Snapshot
+        self.dashboard:'Dashboard'=dashboard
+        if socketLocation is None:
+            socketLocation=dashboard.socketLocation
+        self.socketLocation:str=socketLocation
+        self._inputs:Snapshot=Snapshot('',dashboard.inputFiles)
+        self._stamp:typing.Optional[str]=None
+        self._lock:asyncio.Lock=asyncio.Lock()
+        self._server:typing.Optional[asyncio.AbstractServer]=None
+        self._stopping:asyncio.Event=asyncio.Event()
+        # {writer:task} of every connected client
+        self._clients:typing.Dict[asyncio.StreamWriter,asyncio.Task]={}
+        self.commands:typing.Dict[str,typing.Callable]={
+            'ping':self.ping,
+            'top':self.top,
+            'topLines':self.topLines,
+            'query':self.query,
+            'queryLines':self.queryLines,
+            'series':self.series,
+            'dependencyLines':self.dependencyLines,
+            'dump':self.dump,
+            'getByName':self.getByName,
+            'open':self.open,
+            'set':self.set,
+            'setWhere':self.setWhere,
+            'scanProjects':self.scanProjects,
+            'reload':self.reload,
+            'shutdown':self.shutdown,
+            }
+
+    def _checkInputs(self)->None:
+        """
+        reload everything if any input files have changed
+        """
+        stamp=self._inputs.stamp()
+        if stamp!=self._stamp:
+            self.reload()
+            self._stamp=stamp
+
+    def reload(self)->None:
+        """
+        throw away everything that is loaded so that it will
+        be loaded fresh upon next use
+        """
+        self.dashboard.reload()
+        self._stamp=None
+
+    def ping(self)->str:
+        """
+        check that we are alive
+        """
+        return 'pong'
+
+    def top(self,n:int=4)->typing.List[typing.Dict[str,typing.Any]]:
+        """
+        the top n projects
+        """
+        return [p.toDict() for p in self.dashboard.projects.top(n)]
+
+    def topLines(self,n:int=4)->typing.List[str]:
+        """
+        the top n projects as printable lines
+        """
+        return self.dashboard.formatTop(self.dashboard.projects.top(n))
+
+    def query(self,query:str)->typing.List[typing.Dict[str,typing.Any]]:
+        """
+        the projects matching a query (see query.py)
+        """
+        return [p.toDict() for p in self.dashboard.projects.query(query)]
+
+    def queryLines(self,query:str)->typing.List[str]:
+        """
+        the projects matching a query, as printable lines
+        """
+        return self.dashboard.formatTop(self.dashboard.projects.query(query))
+
+    def series(self)->typing.List[typing.Dict[str,typing.Any]]:
+        """
+        rolled-up totals for each series
+        """
+        return [series.toDict()
+            for series in self.dashboard.projects.series.values()]
+
+    def dependencyLines(self)->typing.List[str]:
+        """
+        what each blocked project is waiting on, as printable lines
+        """
+        return self.dashboard.dependencyLines()
+
+    def dump(self)->str:
+        """
+        dump all projects
+        """
+        return str(self.dashboard)
+
+    def getByName(self,name:str)->typing.Dict[str,typing.Any]:
+        """
+        get a project by name
+        """
+        return self.dashboard.projects.getByName(name).toDict()
+
+    def open(self,name:str)->None:
+        """
+        open the main file associated with a project
+        """
+        self.dashboard.projects.getByName(name).open()
+
+    def set(self,name:str,k:str,v:typing.Any)->typing.Dict[str,typing.Any]:
+        """
+        change a saved field on a project and save
+        """
+        projects=self.dashboard.projects
+        p=projects.getByName(name)
+        with projects.batch() as batch:
+            batch.set(p,k,v)
+        self._stamp=self._inputs.stamp() # our own change, no need to reload
+        return p.toDict()
+
+    def setWhere(self,
+        filters:typing.Dict[str,typing.Any],
+        changes:typing.Dict[str,typing.Any]
+        )->typing.List[str]:
+        """
+        change saved fields on all matching projects and save once
+
+        returns the titles of the projects that matched
+        """
+        matched=self.dashboard.projects.updateWhere(filters,changes)
+        self._stamp=self._inputs.stamp() # our own change, no need to reload
+        return [p.title for p in matched]
+
+    def scanProjects(self,
+        projects:typing.Optional['Projects']=None
+        )->typing.Dict[str,typing.Any]:
+        """
+        scan the projects directory for new/missing/linkable projects
+
+        :param projects: the projects to scan for (default is the
+            dashboard's, but _call() passes the ones that were loaded
+            while it held the lock, since those can't be swapped out
+            from under the scan by a reload)
+        """
+        if projects is None:
+            projects=self.dashboard.projects
+        missingProjects,newProjects,suggestedLinks=projects.scanProjects()
+        return {
+            'missing':[p.toDict() for p in missingProjects],
+            'new':[p.toDict() for p in newProjects],
+            'suggestedLinks':[(p.toDict(),location)
+                for p,location in suggestedLinks]}
+
+    def shutdown(self)->None:
+        """
+        stop serving
+
+        (the caller still gets its answer, then everybody is hung up on)
+        """
+        self._stopping.set()
+
+    async def _call(self,request:typing.Dict[str,typing.Any])->typing.Any:
+        """
+        run a single request
+        """
+        import asyncio
+        cmd=self.commands.get(request.get('cmd'))
+        if cmd is None:
+            raise Exception(UNKNOWN_COMMAND+' "'+str(request.get('cmd'))+'"')
+        args=request.get('args') or {}
+        async with self._lock:
+            self._checkInputs()
+            if request.get('cmd')!='scanProjects':
+                return cmd(**args)
+            projects=self.dashboard.projects # loaded while we hold the lock
+        # scanning hits the disk hard, so keep it off the event loop
+        # (and out of the lock, so other clients are still answered)
+        loop=asyncio.get_running_loop()
+        return await loop.run_in_executor(None,
+            functools.partial(self.scanProjects,projects))
+
+    async def _handleClient(self,reader,writer)->None:
+        """
+        serve one connected client until it hangs up
+        (or until we hang up on it, see serve())
+        """
+        import asyncio
+        self._clients[writer]=asyncio.current_task()
+        try:
+            while True:
+                line=await reader.readline()
+                if not line:
+                    break
+                try:
+                    result=await self._call(json.loads(line))
+                    response={'ok':True,'result':result}
+                except Exception as e: # pylint: disable=broad-except
+                    response={'ok':False,'error':str(e)}
+                writer.write(encode(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self._clients[writer]
+            writer.close()
+
+    async def serve(self)->None:
+        """
+        serve until shutdown is called
+        """
+        import asyncio
+        if os.path.exists(self.socketLocation):
+            os.remove(self.socketLocation) # left over from a crash
+        self._stopping.clear()
+        self._server=await asyncio.start_unix_server(
+            self._handleClient,path=self.socketLocation)
+        try:
+            await self._stopping.wait()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._server.close()
+            # hanging up makes each client's readline() come back empty,
+            # so its handler finishes normally instead of being cancelled
+            handlers=list(self._clients.values())
+            for writer in list(self._clients):
+                writer.close()
+            await asyncio.gather(*handlers,return_exceptions=True)
+            await self._server.wait_closed()
+            if os.path.exists(self.socketLocation):
+                os.remove(self.socketLocation)
+
+    def run(self)->None:
+        """
+        serve until shutdown is called (blocks)
+        """
+        import asyncio
+        if not hasattr(socket,'AF_UNIX'):
+            raise Exception('Unix sockets are not supported on this system')
+        asyncio.run(self.serve())
+
+
+class DaemonClient:
+    """
+    Talks to a running DashboardDaemon
+
+    Deliberately does not import anything heavy, so that asking
+    the daemon is always cheaper than loading everything ourselves.
+    """
+
+    def __init__(self,socketLocation:str,timeout:float=5.0):
+        self.socketLocation:str=socketLocation
+        self.timeout:float=timeout
+        self._sock:typing.Optional[socket.socket]=None
+        self._rfile=None
+
+    @property
+    def available(self)->bool:
+        """
+        does it look like a daemon is running?
+        """
+        return hasattr(socket,'AF_UNIX') \
+            and os.path.exists(self.socketLocation)
+
+    def connect(self)->None:
+        """
+        connect to the daemon
+
+        raises ConnectionError (or other OSError) if it is not running
+        """
+        if self._sock is not None:
+            return
+        if not self.available:
+            raise ConnectionError('Dashboard daemon is not running')
+        sock=socket.socket(socket.AF_UNIX,socket.SOCK_STREAM) # pylint: disable=no-member # noqa: E501
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socketLocation)
+        except OSError:
+            sock.close()
+            raise
+        self._sock=sock
+        self._rfile=sock.makefile('rb')
+
+    def close(self)->None:
+        """
+        disconnect from the daemon
+        """
+        if self._sock is not None:
+            self._rfile.close()
+            self._sock.close()
+            self._sock=None
+            self._rfile=None
+
+    def call(self,cmd:str,**args)->typing.Any:
+        """
+        call a command on the daemon and return its result
+
+        raises an Exception with the daemon's error message on failure
+        """
+        self.connect()
+        self._sock.sendall(encode({'cmd':cmd,'args':args}))
+        line=self._rfile.readline()
+        if not line:
+            self.close()
+            raise ConnectionError('Dashboard daemon hung up')
+        response=json.loads(line)
+        if not response.get('ok'):
+            raise Exception(response.get('error'))
+        return response.get('result')
+
+    def __enter__(self)->'DaemonClient':
+        return self
+
+    def __exit__(self,*args)->None:
+        self.close()
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                elif kv[0]=='--serve':
+                    from WritersDashboard.writersDashboard import Dashboard
+                    DashboardDaemon(Dashboard()).run()
+                elif kv[0]=='--call':
+                    from WritersDashboard.writersDashboard import Dashboard
+                    with DaemonClient(Dashboard().socketLocation) as client:
+                        print(client.call(kv[1]))
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  daemon.py [options]')
+        print('Options:')
+        print('   --serve .............. run the dashboard daemon')
+        print('   --call=cmd ........... call a command on a running daemon') # noqa: E501 # pylint: disable=line-too-long
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
@@ -0,0 +1,179 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Find files that have exactly the same contents
+
+Writers tend to leave copies of the same manuscript lying about
+(book-final.docx, book-final2.docx, a backup folder or two), so this
+narrows things down in stages, each costlier than the last but run
+on fewer files:
+    1) group by size (one stat per file)
+    2) within a size, group by a hash of the start and end of the file
+    3) within those, group by a hash of the whole file
+
+Files that are alone at any stage are dropped right away, so most
+files are never even opened.
+"""
+import typing
+import os
+import mmap
+import hashlib
+import collections
+from .profiling import timed
+
+
+# how much of each end of a file to hash in the partial stage
+PARTIAL_SIZE:int=64*1024
+# how much to read at a time for the full hash
+CHUNK_SIZE:int=1024*1024
+# files at least this big are memory-mapped rather than read
+MMAP_THRESHOLD:int=4*1024*1024
+
+
+def _group(
+    paths:typing.Iterable[str],
+    keyFn:typing.Callable[[str],typing.Optional[typing.Hashable]]
+    )->typing.List[typing.List[str]]:
+    """
+    group paths by a key, keeping only groups of more than one
+    (a key of None means the file couldn't be read, so leave it out)
+    """
+    groups:typing.Dict[typing.Hashable,typing.List[str]]=\
+        collections.defaultdict(list)
+    for path in paths:
+        key=keyFn(path)
+        if key is not None:
+            groups[key].append(path)
+    return [group for group in groups.values() if len(group)>1]
+
+
+def partialHash(path:str,size:typing.Optional[int]=None
+    )->typing.Optional[bytes]:
+    """
+    hash of the first and last PARTIAL_SIZE bytes of a file
+
+    (for files no bigger than 2*PARTIAL_SIZE this is the whole file)
+    """
+    try:
+        with open(path,'rb') as f:
+            if size is None:
+                size=os.fstat(f.fileno()).st_size
+            h=hashlib.blake2b(f.read(PARTIAL_SIZE))
+            if size>2*PARTIAL_SIZE:
+                f.seek(-PARTIAL_SIZE,os.SEEK_END)
+                h.update(f.read(PARTIAL_SIZE))
+            elif size>PARTIAL_SIZE:
+                h.update(f.read())
+    except OSError:
+        return None
+    return h.digest()
+
+
+def fullHash(path:str)->typing.Optional[bytes]:
+    """
+    hash of the entire file
+
+    Big files are memory-mapped, everything else is streamed
+    a chunk at a time, so memory use stays flat either way.
+    """
+    h=hashlib.blake2b()
+    try:
+        with open(path,'rb') as f:
+            size=os.fstat(f.fileno()).st_size
+            if size>=MMAP_THRESHOLD:
+                try:
+                    with mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as m:
+                        view=memoryview(m)
+                        for i in range(0,size,CHUNK_SIZE):
+                            h.update(view[i:i+CHUNK_SIZE])
+                        view.release()
+                    return h.digest()
+                except (ValueError,OSError): # can't be mapped, so read it
+                    f.seek(0)
+                    h=hashlib.blake2b()
+            while True:
+                chunk=f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.digest()
+
+
+@timed()
+def findDuplicates(paths:typing.Iterable[str]
+    )->typing.List[typing.List[str]]:
+    """
+    find groups of files with identical contents
+
+    :param paths: files to compare (each path is only considered once,
+        and empty files are left out)
+
+    returns [[path,...]] with each group holding two or more paths,
+        in the order they were given
+    """
+    order:typing.Dict[str,int]={}
+    sizes:typing.Dict[str,int]={}
+    for path in paths:
+        if path in order:
+            continue
+        order[path]=len(order)
+        try:
+            size=os.stat(path).st_size
+        except OSError:
+            continue
+        if size: # empty files are all alike, but hardly copies
+            sizes[path]=size
+    ret=[]
+    for sameSize in _group(sizes,sizes.get):
+        size=sizes[sameSize[0]]
+        samePartials=_group(sameSize,lambda p,size=size:partialHash(p,size))
+        for samePartial in samePartials:
+            if size<=2*PARTIAL_SIZE: # the partial hash was the whole file
+                ret.append(samePartial)
+            else:
+                ret.extend(_group(samePartial,fullHash))
+    for group in ret:
+        group.sort(key=order.get)
+    ret.sort(key=lambda group:order[group[0]])
+    return ret
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                elif kv[0]=='--in':
+                    paths=[]
+                    for directory,_,filenames in os.walk(kv[1]):
+                        paths.extend(os.path.join(directory,filename)
+                            for filename in filenames)
+                    for group in findDuplicates(paths):
+                        print('\n'.join(group))
+                        print('----------------')
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  dedupe.py [options]')
+        print('Options:')
+        print('   --in=directory ....... list identical files anywhere in a directory') # noqa: E501 # pylint: disable=line-too-long
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
@@ -0,0 +1,275 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Juggle info about which projects are blocked by which
+
+Project.blockedBy is free text, such as
+    "Dragon Tide; cover art"
+Each part that names another project becomes an edge in a graph, and
+anything else (like "cover art") is kept as an outside blocker.  Titles
+are looked for before splitting, so "Pride and Prejudice" is one
+blocker, not two.
+
+The graph is only worked out again when it is actually needed after
+something changed, and everything is computed in a single pass over a
+topological ordering, so it is linear in the size of the graph.
+"""
+import typing
+import re
+import collections
+if typing.TYPE_CHECKING:
+    from .projects import Project, Projects
+
+
+_SPLIT=re.compile(r'(\s*(?:[,;&+|]|\band\b)\s*)',re.IGNORECASE)
+
+
+def _normalizeTitle(title:str)->str:
+    """
+    a title ignoring case and whitespace
+    """
+    return ' '.join(title.lower().split())
+
+
+def parseBlockedBy(
+    blockedBy:typing.Optional[str],
+    isTitle:typing.Optional[typing.Callable[[str],bool]]=None
+    )->typing.List[str]:
+    """
+    split a blockedBy string into the individual things named
+
+    :param isTitle: tells whether some text is exactly a known title,
+        in which case it is kept whole even if it contains a separator
+        (the longest title starting at each point wins)
+    """
+    if not blockedBy:
+        return []
+    # [name,separator,name,separator,...,name]
+    pieces=_SPLIT.split(blockedBy)
+    ret=[]
+    i=0
+    while i<len(pieces):
+        end=i+1
+        if isTitle is not None:
+            for j in range(len(pieces)-1,i,-2):
+                if isTitle(''.join(pieces[i:j+1])):
+                    end=j+1
+                    break
+        name=''.join(pieces[i:end]).strip()
+        if name:
+            ret.append(name)
+        i=end+1
+    return ret
+
+
+class DependencyGraph:
+    """
+    The graph of which projects are blocked by which
+    """
+
+    def __init__(self,projects:'Projects'):
+        self.projects:'Projects'=projects
+        # {project:[projects it is waiting on]}
+        self.blockers:typing.Dict['Project',typing.List['Project']]={}
+        # {project:[projects waiting on it]}
+        self.dependents:typing.Dict['Project',typing.List['Project']]={}
+        # {project:[blockers that aren't projects]}
+        self.outsideBlockers:typing.Dict['Project',typing.List[str]]={}
+        self.order:typing.List['Project']=[]
+        self.cycle:typing.List['Project']=[]
+        self._finish:typing.Dict['Project',float]={}
+        self._critical:typing.Dict['Project',typing.Optional['Project']]={}
+        self._structureDirty:bool=True
+        self._hoursDirty:bool=True
+        self._version:int=0
+
+    def structureChanged(self)->None:
+        """
+        something changed that might add or remove edges
+        (blockedBy, titles, projects themselves)
+        """
+        self._structureDirty=True
+        self._hoursDirty=True
+
+    def hoursChanged(self)->None:
+        """
+        something changed that affects how long projects will take
+        """
+        self._hoursDirty=True
+
+    def _resolve(self)->None:
+        """
+        turn blockedBy strings into edges
+        """
+        makeComparable=self.projects._makeComparable # pylint: disable=protected-access # noqa: E501
+        # exact titles first, then the more permissive comparison
+        # (which would lump "Book 1" and "Book 2" of a series together)
+        byExactTitle:typing.Dict[str,typing.List['Project']]=\
+            collections.defaultdict(list)
+        byTitle:typing.Dict[str,typing.List['Project']]=\
+            collections.defaultdict(list)
+        for p in self.projects:
+            if p.title:
+                byExactTitle[_normalizeTitle(p.title)].append(p)
+                byTitle[makeComparable(p.title)].append(p)
+
+        def isTitle(name:str)->bool:
+            return _normalizeTitle(name) in byExactTitle
+
+        self.blockers={}
+        self.dependents={p:[] for p in self.projects}
+        self.outsideBlockers={}
+        for p in self.projects:
+            blockers=[]
+            outside=[]
+            for name in parseBlockedBy(p.blockedBy,isTitle):
+                matches=byExactTitle.get(_normalizeTitle(name)) \
+                    or byTitle.get(makeComparable(name),())
+                if len(matches)==1 and matches[0] is not p:
+                    if matches[0] not in blockers:
+                        blockers.append(matches[0])
+                        self.dependents[matches[0]].append(p)
+                else:
+                    outside.append(name)
+            self.blockers[p]=blockers
+            if outside:
+                self.outsideBlockers[p]=outside
+        self._sort()
+        self._structureDirty=False
+
+    def _sort(self)->None:
+        """
+        topologically sort the projects (Kahn's algorithm)
+
+        Whatever can't be sorted is part of (or stuck behind) a cycle.
+        """
+        waitingOn={p:len(b) for p,b in self.blockers.items()}
+        ready=collections.deque(p for p in self.projects if not waitingOn[p])
+        order=[]
+        while ready:
+            p=ready.popleft()
+            order.append(p)
+            for dependent in self.dependents[p]:
+                waitingOn[dependent]-=1
+                if not waitingOn[dependent]:
+                    ready.append(dependent)
+        self.order=order
+        self.cycle=[p for p in self.projects if waitingOn[p]]
+
+    def _schedule(self)->None:
+        """
+        work out when everything can finish, following the graph
+        """
+        if self._structureDirty:
+            self._resolve()
+        finish={}
+        critical={}
+        for p in self.order:
+            start=0
+            before=None
+            for blocker in self.blockers[p]:
+                if finish[blocker]>start:
+                    start=finish[blocker]
+                    before=blocker
+            finish[p]=start+p.totalHoursRemaining
+            critical[p]=before
+        for p in self.cycle: # no sensible answer, so just use their own time
+            finish[p]=p.totalHoursRemaining
+            critical[p]=None
+        self._finish=finish
+        self._critical=critical
+        self._hoursDirty=False
+        self._version+=1
+
+    def _ensure(self)->None:
+        if self._hoursDirty:
+            self._schedule()
+
+    @property
+    def version(self)->int:
+        """
+        goes up every time the schedule is worked out again
+        (so anything derived from it knows when to follow suit)
+        """
+        self._ensure()
+        return self._version
+
+    def finishHours(self,project:'Project')->float:
+        """
+        working hours from now until the project can be done,
+        counting everything it has to wait on
+        """
+        self._ensure()
+        return self._finish.get(project,project.totalHoursRemaining)
+
+    def upstreamHours(self,project:'Project')->float:
+        """
+        working hours the project has to wait on other projects
+        """
+        self._ensure()
+        finish=self._finish.get(project)
+        if finish is None:
+            return 0
+        return finish-project.totalHoursRemaining
+
+    def criticalPath(self,project:'Project')->typing.List['Project']:
+        """
+        the chain of projects that decides when this project
+        can be finished, starting with the first one to do
+        """
+        self._ensure()
+        path=[]
+        while project is not None:
+            path.append(project)
+            project=self._critical.get(project)
+        path.reverse()
+        return path
+
+    def topologicalOrder(self)->typing.List['Project']:
+        """
+        all projects, blockers before the projects they block
+        (leaving out any caught in a cycle)
+        """
+        self._ensure()
+        return self.order
+
+    def cycles(self)->typing.List['Project']:
+        """
+        projects that are waiting on each other in a circle
+        (or waiting on such a circle)
+        """
+        self._ensure()
+        return self.cycle
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                elif kv[0]=='--parse':
+                    print(parseBlockedBy(kv[1]))
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  dependencies.py [options]')
+        print('Options:')
+        print('   --parse=blockedBy .... show how a blockedBy value is split up') # noqa: E501 # pylint: disable=line-too-long
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
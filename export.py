@@ -0,0 +1,141 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Export projects, computed values and all, for other tools to read
+
+Everything is streamed a row at a time, so memory use is the same
+no matter how many projects there are.  Formats are:
+    ndjson  one json object per line
+    csv     a header line followed by one line per project
+"""
+import typing
+import sys
+import csv
+import json
+import datetime
+if typing.TYPE_CHECKING:
+    from .projects import Project
+
+
+# computed values exported along with the saved fields
+COMPUTED_FIELDS:typing.List[str]=[
+    'ETA','totalPercent','daysAhead','stageGoal']
+
+FORMATS:typing.Tuple[str,...]=('ndjson','csv')
+
+
+def _exportValue(v:typing.Any)->typing.Any:
+    """
+    make a value json/csv friendly
+    """
+    if isinstance(v,(datetime.datetime,datetime.date)):
+        return v.isoformat()
+    return v
+
+
+def exportFields()->typing.List[str]:
+    """
+    the names of all exported fields, in order
+    """
+    from .projects import Project
+    return list(Project.SAVE_FIELDS)+COMPUTED_FIELDS
+
+
+def exportRows(projects:typing.Iterable['Project']
+    )->typing.Generator[typing.Dict[str,typing.Any],None,None]:
+    """
+    a dict of saved fields plus computed values for each project,
+    produced one at a time
+    """
+    fields=exportFields()
+    for project in projects:
+        yield {k:_exportValue(getattr(project,k)) for k in fields}
+
+
+def writeNdjson(
+    rows:typing.Iterable[typing.Dict[str,typing.Any]],
+    out:typing.TextIO
+    )->int:
+    """
+    write rows as newline-delimited json
+
+    returns how many rows were written
+    """
+    count=0
+    for row in rows:
+        out.write(json.dumps(row,default=str))
+        out.write('\n')
+        count+=1
+    return count
+
+
+def writeCsv(
+    rows:typing.Iterable[typing.Dict[str,typing.Any]],
+    out:typing.TextIO
+    )->int:
+    """
+    write rows as csv, with a header line
+
+    returns how many rows were written
+    """
+    writer=csv.writer(out)
+    fields=exportFields()
+    writer.writerow(fields)
+    count=0
+    for row in rows:
+        writer.writerow(['' if row[k] is None else row[k] for k in fields])
+        count+=1
+    return count
+
+
+def export(
+    projects:typing.Iterable['Project'],
+    fmt:str='ndjson',
+    location:typing.Optional[str]=None
+    )->int:
+    """
+    export projects to a file, or to stdout if there is no location
+
+    :param fmt: one of FORMATS
+
+    returns how many projects were written
+    """
+    if fmt not in FORMATS:
+        raise Exception('Unknown export format "'+fmt+'" (expected one of '+', '.join(FORMATS)+')') # noqa: E501 # pylint: disable=line-too-long
+    write=writeNdjson if fmt=='ndjson' else writeCsv
+    if location is None:
+        return write(exportRows(projects),sys.stdout)
+    with open(location,'w',encoding='utf-8',newline='') as f:
+        return write(exportRows(projects),f)
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                elif kv[0]=='--fields':
+                    print(','.join(exportFields()))
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  export.py [options]')
+        print('Options:')
+        print('   --fields ............. list the fields that get exported')
+
+
+if __name__=='__main__':
+    cmdline(sys.argv[1:])
@@ -0,0 +1,189 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Gitignore-style rules for what not to look at when scanning
+for projects
+
+Supports the usual gitignore things:
+    # comments and blank lines
+    name          matches at any depth
+    dir/name      (or /name) matches relative to the projects directory
+    name/         only matches directories
+    * ? [abc] **  wildcards
+    !pattern      un-ignores something an earlier pattern ignored
+
+Matching ignores case, since writing folders tend to live
+on case-insensitive filesystems.
+"""
+import typing
+import os
+import re
+
+
+IGNORE_FILENAME:str='.dashboardignore'
+
+
+def _translate(pattern:str)->str:
+    """
+    turn a single gitignore glob into a regex
+    """
+    ret=[]
+    i=0
+    n=len(pattern)
+    while i<n:
+        c=pattern[i]
+        if c=='*':
+            if pattern[i:i+3]=='**/':
+                ret.append('(?:.*/)?')
+                i+=3
+                continue
+            if pattern[i:i+2]=='**':
+                ret.append('.*')
+                i+=2
+                continue
+            ret.append('[^/]*')
+        elif c=='?':
+            ret.append('[^/]')
+        elif c=='[':
+            end=pattern.find(']',i+1)
+            if end<0:
+                ret.append(re.escape(c))
+            else:
+                chars=pattern[i+1:end]
+                if chars.startswith('!'):
+                    chars='^'+chars[1:]
+                ret.append('['+chars.replace('\\','\\\\')+']')
+                i=end
+        else:
+            ret.append(re.escape(c))
+        i+=1
+    return ''.join(ret)
+
+
+class IgnoreRule:
+    """
+    A single gitignore-style pattern
+    """
+
+    def __init__(self,pattern:str):
+        self.pattern:str=pattern
+        self.negate:bool=pattern.startswith('!')
+        if self.negate:
+            pattern=pattern[1:]
+        self.dirOnly:bool=pattern.endswith('/')
+        pattern=pattern.rstrip('/')
+        anchored='/' in pattern
+        pattern=pattern.lstrip('/')
+        regex=_translate(pattern)
+        if anchored:
+            regex='^'+regex+'$'
+        else:
+            regex='(?:^|/)'+regex+'$'
+        self.regex:typing.Pattern=re.compile(regex,re.IGNORECASE)
+
+    def matches(self,relPath:str,isDir:bool)->bool:
+        """
+        does this rule apply to the path?
+        """
+        if self.dirOnly and not isDir:
+            return False
+        return self.regex.search(relPath) is not None
+
+    def __repr__(self)->str:
+        return self.pattern
+
+
+class IgnoreRules:
+    """
+    A set of gitignore-style rules (the last one that matches wins)
+    """
+
+    def __init__(self,patterns:typing.Iterable[str]=()):
+        self.rules:typing.List[IgnoreRule]=[]
+        self.add(patterns)
+
+    def add(self,patterns:typing.Iterable[str])->None:
+        """
+        add more patterns
+        """
+        for pattern in patterns:
+            pattern=pattern.strip()
+            if pattern and not pattern.startswith('#'):
+                self.rules.append(IgnoreRule(pattern))
+        self._anyNegated=any(rule.negate for rule in self.rules)
+
+    @classmethod
+    def forSettings(cls,settings)->'IgnoreRules':
+        """
+        the rules from settings.ini's scanIgnore (separated by ;)
+        plus those in a .dashboardignore file in the projects directory
+        """
+        rules=cls((settings.scanIgnore or '').split(';'))
+        location=os.path.join(settings.projectsDirectory,IGNORE_FILENAME)
+        try:
+            with open(location,'r',encoding='utf-8') as f:
+                rules.add(f.read().split('\n'))
+        except OSError:
+            pass
+        return rules
+
+    def ignored(self,relPath:str,isDir:bool)->bool:
+        """
+        should this path be left alone?
+
+        :param relPath: path relative to the projects directory,
+            separated by /
+        """
+        if not self._anyNegated: # no need to find the last match
+            return any(rule.matches(relPath,isDir) for rule in self.rules)
+        ret=False
+        for rule in self.rules:
+            if rule.negate==ret and rule.matches(relPath,isDir):
+                ret=not ret
+        return ret
+
+    def __len__(self)->int:
+        return len(self.rules)
+
+    def __repr__(self)->str:
+        return ';'.join(str(rule) for rule in self.rules)
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    patterns=[]
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                elif kv[0]=='--patterns':
+                    patterns=kv[1].split(';')
+                elif kv[0]=='--test':
+                    rules=IgnoreRules(patterns)
+                    path=kv[1].replace(os.sep,'/')
+                    isDir=path.endswith('/')
+                    print(path,'ignored' if rules.ignored(path.rstrip('/'),isDir) else 'scanned') # noqa: E501 # pylint: disable=line-too-long
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  ignoreRules.py [options]')
+        print('Options:')
+        print('   --patterns=p[;p...] .. patterns to test with')
+        print('   --test=path[/] ....... is the path ignored? (end directories with /)') # noqa: E501 # pylint: disable=line-too-long
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
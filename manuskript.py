@@ -0,0 +1,383 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Read word counts and progress out of Manuskript (.msk) projects
+
+Manuskript saves a project one of two ways:
+    * as a single zip file, book.msk
+    * as a small book.msk marker file next to a book/ folder
+Either way, the story itself is in outline/, one text file per scene
+(in a folder per chapter), each starting with a header like
+    title:              The Storm
+    ID:                 12
+    status:             2
+    label:              1
+
+followed by a blank line and then the scene's text.  status.txt and
+labels.txt list the names that go with the numbers.
+
+The index is kept at the scene level, along with a stamp of each
+scene file (crc/size/date from the zip's central directory, or
+mtime/size in a folder).  A refresh only compares stamps, and only
+re-reads the scenes that actually changed.
+"""
+import typing
+import os
+import re
+import json
+import zipfile
+
+
+MSK_EXTENSION:str='.msk'
+# where the indexes of all projects are remembered between runs
+CACHE_FILENAME:str='manuskriptIndex.json'
+
+_HEADER=re.compile(r'^(\w+)\s*:\s*(.*?)\s*$')
+_NAMED=re.compile(r'^\s*(\d+)\s*:\s*(.*?)\s*(?:\(?#[0-9a-fA-F]{3,8}\)?)?\s*$') # noqa: E501 # pylint: disable=line-too-long
+
+
+class Scene(typing.NamedTuple):
+    """
+    What we know about a single scene
+    """
+    path:str
+    title:str
+    words:int
+    status:str
+    label:str
+    stamp:str
+
+
+def _isScene(path:str)->bool:
+    """
+    is this file within a manuskript project a scene?
+    """
+    return path.startswith('outline/') \
+        and path.endswith(('.md','.txt')) \
+        and not path.endswith('/folder.txt')
+
+
+def parseScene(path:str,text:str,stamp:str)->Scene:
+    """
+    parse the contents of a scene file
+    """
+    header:typing.Dict[str,str]={}
+    lines=text.split('\n')
+    bodyStart=0
+    for i,line in enumerate(lines):
+        if not line.strip():
+            bodyStart=i+1
+            break
+        m=_HEADER.match(line)
+        if m is None: # no header after all
+            header={}
+            bodyStart=0
+            break
+        header[m.group(1)]=m.group(2)
+    else:
+        bodyStart=len(lines)
+    words=sum(len(line.split()) for line in lines[bodyStart:])
+    return Scene(
+        path,
+        header.get('title',path.rsplit('/',1)[-1]),
+        words,
+        header.get('status',''),
+        header.get('label',''),
+        stamp)
+
+
+def parseNames(text:str)->typing.Dict[str,str]:
+    """
+    parse status.txt or labels.txt into {id:name}
+
+    Lines can be "id: name" (optionally followed by a color),
+    or simply a name, in which case the id is its position.
+    """
+    ret={}
+    lines=[line for line in text.split('\n') if line.strip()]
+    for i,line in enumerate(lines):
+        m=_NAMED.match(line)
+        if m is not None:
+            ret[m.group(1)]=m.group(2)
+        else:
+            ret[str(i)]=line.strip()
+    return ret
+
+
+class ManuskriptIndex:
+    """
+    A scene-by-scene index of a single Manuskript project
+    """
+
+    def __init__(self,location:str):
+        self.location:str=location
+        self.scenes:typing.Dict[str,Scene]={}
+        self.statusNames:typing.Dict[str,str]={}
+        self.labelNames:typing.Dict[str,str]={}
+        # {path:stamp} of status.txt and labels.txt
+        self._nameStamps:typing.Dict[str,str]={}
+        # stat of a zipped .msk, to skip even opening it if unchanged
+        self._stamp:typing.Optional[str]=None
+        # how many files were read by the last refresh()
+        self.reads:int=0
+
+    @property
+    def folder(self)->str:
+        """
+        where an unzipped project keeps its files
+        """
+        if self.location.lower().endswith(MSK_EXTENSION):
+            return self.location[0:-len(MSK_EXTENSION)]
+        return self.location
+
+    def refresh(self)->bool:
+        """
+        bring the index up to date, re-reading only what changed
+
+        returns whether anything changed
+        """
+        self.reads=0
+        if os.path.isdir(self.folder) and self.folder!=self.location:
+            return self._refreshFolder()
+        return self._refreshZip()
+
+    def _refreshZip(self)->bool:
+        st=os.stat(self.location)
+        stamp=f'{st.st_mtime_ns}:{st.st_size}'
+        if stamp==self._stamp:
+            return False
+        with zipfile.ZipFile(self.location) as z:
+            listing={info.filename:f'{info.CRC}:{info.file_size}:{info.date_time}' # noqa: E501 # pylint: disable=line-too-long
+                for info in z.infolist() if not info.is_dir()}
+            changed=self._update(listing,
+                lambda path:z.read(path).decode('utf-8','replace'))
+        self._stamp=stamp
+        return changed
+
+    def _refreshFolder(self)->bool:
+        listing={}
+        folder=self.folder
+        stack=['']
+        while stack:
+            relPath=stack.pop()
+            try:
+                entries=os.scandir(os.path.join(folder,relPath))
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    path=relPath+entry.name
+                    if entry.is_dir():
+                        stack.append(path+'/')
+                    elif _isScene(path) or path in ('status.txt','labels.txt'):
+                        st=entry.stat()
+                        listing[path]=f'{st.st_mtime_ns}:{st.st_size}'
+
+        def read(path:str)->str:
+            with open(os.path.join(folder,path),'r',
+                encoding='utf-8',errors='replace') as f:
+                #
+                return f.read()
+
+        self._stamp=None
+        return self._update(listing,read)
+
+    def _update(self,
+        listing:typing.Dict[str,str],
+        read:typing.Callable[[str],str]
+        )->bool:
+        """
+        compare a {path:stamp} listing to the index, reading
+        only those files whose stamps differ
+        """
+        changed=False
+        for path,attr in (('status.txt','statusNames'),('labels.txt','labelNames')): # noqa: E501 # pylint: disable=line-too-long
+            stamp=listing.get(path)
+            if stamp!=self._nameStamps.get(path):
+                names={}
+                if stamp is not None:
+                    names=parseNames(read(path))
+                    self.reads+=1
+                    self._nameStamps[path]=stamp
+                else:
+                    self._nameStamps.pop(path,None)
+                setattr(self,attr,names)
+                changed=True
+        for path,stamp in listing.items():
+            if not _isScene(path):
+                continue
+            scene=self.scenes.get(path)
+            if scene is None or scene.stamp!=stamp:
+                self.scenes[path]=parseScene(path,read(path),stamp)
+                self.reads+=1
+                changed=True
+        for path in [path for path in self.scenes if path not in listing]:
+            del self.scenes[path]
+            changed=True
+        return changed
+
+    @property
+    def words(self)->int:
+        """
+        total words in all scenes
+        """
+        return sum(scene.words for scene in self.scenes.values())
+
+    def statusName(self,scene:Scene)->str:
+        """
+        the name of a scene's status
+        """
+        return self.statusNames.get(scene.status,scene.status)
+
+    def labelName(self,scene:Scene)->str:
+        """
+        the name of a scene's label
+        """
+        return self.labelNames.get(scene.label,scene.label)
+
+    def wordsByStatus(self)->typing.Dict[str,int]:
+        """
+        {statusName:words}
+        """
+        ret:typing.Dict[str,int]={}
+        for scene in self.scenes.values():
+            name=self.statusName(scene)
+            ret[name]=ret.get(name,0)+scene.words
+        return ret
+
+    def fractionAtStatus(self,statusName:str)->typing.Optional[float]:
+        """
+        the fraction of scenes that have reached a status
+        (or any status listed after it)
+
+        returns None if there is no such status, or no scenes
+        """
+        comparable=statusName.strip().lower()
+        order=list(self.statusNames)
+        position=None
+        for i,statusId in enumerate(order):
+            if self.statusNames[statusId].strip().lower()==comparable:
+                position=i
+                break
+        if position is None or not self.scenes:
+            return None
+        reached=set(order[position:])
+        done=sum(1 for scene in self.scenes.values()
+            if scene.status in reached)
+        return done/len(self.scenes)
+
+    def toDict(self)->typing.Dict[str,typing.Any]:
+        """
+        everything needed to pick up where we left off next time
+        """
+        return {
+            'stamp':self._stamp,
+            'nameStamps':self._nameStamps,
+            'statusNames':self.statusNames,
+            'labelNames':self.labelNames,
+            'scenes':[list(scene) for scene in self.scenes.values()]}
+
+    @classmethod
+    def fromDict(cls,location:str,data:typing.Dict[str,typing.Any]
+        )->'ManuskriptIndex':
+        """
+        the opposite of toDict()
+        """
+        index=cls(location)
+        index._stamp=data.get('stamp')
+        index._nameStamps=dict(data.get('nameStamps',{}))
+        index.statusNames=dict(data.get('statusNames',{}))
+        index.labelNames=dict(data.get('labelNames',{}))
+        for scene in data.get('scenes',()):
+            scene=Scene(*scene)
+            index.scenes[scene.path]=scene
+        return index
+
+    def __repr__(self)->str:
+        ret=[f'{self.location}: {self.words} words in {len(self.scenes)} scenes'] # noqa: E501 # pylint: disable=line-too-long
+        for name,words in self.wordsByStatus().items():
+            ret.append(f'  {name}: {words}')
+        return '\n'.join(ret)
+
+
+class ManuskriptIndexes:
+    """
+    The indexes of any number of Manuskript projects,
+    remembered between runs in a single json file
+    """
+
+    def __init__(self,location:str=CACHE_FILENAME):
+        self.location:str=location
+        self.indexes:typing.Dict[str,ManuskriptIndex]={}
+        try:
+            with open(location,'r',encoding='utf-8') as f:
+                data=json.load(f)
+        except (OSError,ValueError):
+            data={}
+        if isinstance(data,dict):
+            for documentLocation,indexData in data.items():
+                try:
+                    self.indexes[documentLocation]=\
+                        ManuskriptIndex.fromDict(documentLocation,indexData)
+                except (TypeError,ValueError,AttributeError):
+                    pass # from some other version, so just start over
+
+    def get(self,documentLocation:str)->ManuskriptIndex:
+        """
+        the index for a project (a new, empty one if we haven't seen it)
+        """
+        index=self.indexes.get(documentLocation)
+        if index is None:
+            index=ManuskriptIndex(documentLocation)
+            self.indexes[documentLocation]=index
+        return index
+
+    def save(self)->None:
+        """
+        remember all indexes for next time
+
+        Failing to save is not an error, we'll just read more next time.
+        """
+        data={k:index.toDict() for k,index in self.indexes.items()}
+        tmp=self.location+'.tmp'
+        try:
+            with open(tmp,'w',encoding='utf-8') as f:
+                json.dump(data,f)
+            os.replace(tmp,self.location)
+        except OSError:
+            pass
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                elif kv[0]=='--index':
+                    index=ManuskriptIndex(kv[1])
+                    index.refresh()
+                    print(index)
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  manuskript.py [options]')
+        print('Options:')
+        print('   --index=file.msk ..... show word counts of a manuskript project by status') # noqa: E501 # pylint: disable=line-too-long
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
@@ -0,0 +1,208 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Opt-in timing of the dashboard's hot spots
+
+Turn it on with the --profile command line flag, or by setting
+the WRITERSDASHBOARD_PROFILE environment variable (to 1, or to a file
+prefix to save the results to).
+
+While it is off, a timed function costs one extra function call and
+a check of a global flag.
+
+Results come out either as a summary table, or as "collapsed stacks"
+(one line per call stack, "outer;inner;innermost microseconds")
+which flamegraph.pl, speedscope and friends all understand.
+"""
+import typing
+import os
+import time
+import threading
+import functools
+
+
+ENV_VAR:str='WRITERSDASHBOARD_PROFILE'
+
+_enabled:bool=bool(os.environ.get(ENV_VAR))
+_local=threading.local()
+_lock=threading.Lock()
+# {name:[calls,totalSeconds,selfSeconds]}
+_stats:typing.Dict[str,typing.List[typing.Any]]={}
+# {(outer,...,inner):selfSeconds}
+_stacks:typing.Dict[typing.Tuple[str,...],float]={}
+
+
+def enable(on:bool=True)->None:
+    """
+    turn profiling on (or off)
+    """
+    global _enabled # pylint: disable=global-statement
+    _enabled=on
+
+
+def enabled()->bool:
+    """
+    is profiling turned on?
+    """
+    return _enabled
+
+
+def reset()->None:
+    """
+    throw away everything recorded so far
+    """
+    with _lock:
+        _stats.clear()
+        _stacks.clear()
+
+
+class Section:
+    """
+    Time a block of code
+        with profiling.Section('parse'):
+            ...
+
+    (does nothing if profiling is off)
+    """
+
+    def __init__(self,name:str):
+        self.name:str=name
+        self.start:float=0
+        self.active:bool=False
+
+    def __enter__(self)->'Section':
+        self.active=_enabled
+        if self.active:
+            stack=getattr(_local,'stack',None)
+            if stack is None:
+                stack=[]
+                _local.stack=stack
+            stack.append([self.name,0.0]) # [name,time spent in children]
+            self.start=time.perf_counter()
+        return self
+
+    def __exit__(self,*args)->None:
+        if not self.active:
+            return
+        elapsed=time.perf_counter()-self.start
+        stack=_local.stack
+        name,childTime=stack.pop()
+        selfTime=elapsed-childTime
+        if stack:
+            stack[-1][1]+=elapsed
+        path=tuple(s[0] for s in stack)+(name,)
+        with _lock:
+            stat=_stats.get(name)
+            if stat is None:
+                _stats[name]=[1,elapsed,selfTime]
+            else:
+                stat[0]+=1
+                stat[1]+=elapsed
+                stat[2]+=selfTime
+            _stacks[path]=_stacks.get(path,0.0)+selfTime
+
+
+def timed(name:str=None)->typing.Callable[[typing.Callable],typing.Callable]:
+    """
+    decorator to time every call of a function
+
+    Works on properties too, as long as it goes underneath @property:
+        @property
+        @timed()
+        def ETA(self):
+
+    :param name: what to call it in the results (default is the
+        function's qualified name, eg "Projects.loadProjects")
+    """
+    def decorator(fn:typing.Callable)->typing.Callable:
+        label=name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args,**kwargs):
+            if not _enabled:
+                return fn(*args,**kwargs)
+            with Section(label):
+                return fn(*args,**kwargs)
+
+        return wrapper
+    return decorator
+
+
+def summary()->str:
+    """
+    a table of everything recorded, slowest first
+    """
+    with _lock:
+        rows=sorted(_stats.items(),key=lambda item:-item[1][1])
+    ret=[f'{"calls":>10} {"total ms":>12} {"self ms":>12} {"ms/call":>10}  name'] # noqa: E501 # pylint: disable=line-too-long
+    for name,(calls,total,selfTime) in rows:
+        ret.append(f'{calls:>10} {total*1000:>12.3f} {selfTime*1000:>12.3f} {total*1000/calls:>10.4f}  {name}') # noqa: E501 # pylint: disable=line-too-long
+    return '\n'.join(ret)
+
+
+def collapsedStacks()->str:
+    """
+    everything recorded as collapsed stacks
+    (self time in whole microseconds, for flamegraph tools)
+    """
+    with _lock:
+        items=list(_stacks.items())
+    return '\n'.join(
+        ';'.join(path)+' '+str(int(round(seconds*1000000)))
+        for path,seconds in items)
+
+
+def report(prefix:typing.Optional[str]=None)->None:
+    """
+    print the summary, or save it and the collapsed stacks
+    to prefix+'.txt' and prefix+'.folded'
+    """
+    if not prefix:
+        print(summary())
+        return
+    with open(prefix+'.txt','w',encoding='utf-8') as f:
+        f.write(summary()+'\n')
+    with open(prefix+'.folded','w',encoding='utf-8') as f:
+        f.write(collapsedStacks()+'\n')
+    print('Profile saved to',prefix+'.txt','and',prefix+'.folded')
+
+
+def reportPrefix()->typing.Optional[str]:
+    """
+    the file prefix given in the environment variable, if any
+    """
+    value=os.environ.get(ENV_VAR,'')
+    if value.lower() in ('','1','true','yes','on'):
+        return None
+    return value
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  profiling.py [options]')
+        print('Options:')
+        print('   NONE')
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
@@ -6,10 +6,19 @@ Juggle info about projects
 import typing
 import os
 import datetime
-from paths import URL,URLCompatible
+import zipfile
 from .uiRepresentation import UIRepresentation
 from .settings import Settings
 from .stageInfo import StageInfo, StageInfos
+from .query import ProjectIndex, Query, Condition
+from .series import Series, CONTRIBUTING_FIELDS
+from .dependencies import DependencyGraph
+from .profiling import timed
+from .ignoreRules import IgnoreRules
+from .dedupe import findDuplicates
+from .manuskript import ManuskriptIndexes, MSK_EXTENSION, CACHE_FILENAME
+if typing.TYPE_CHECKING:
+    from paths import URL,URLCompatible
 
 
 def _dateparse(s:str)->datetime.datetime:
@@ -29,7 +38,10 @@ class Project(UIRepresentation):
         int,str,str,str,int,int,
         int,float,_dateparse,str,str]
 
+    _WATCHED:typing.FrozenSet[str]=frozenset(SAVE_FIELDS)
+
     def __init__(self,settings:Settings,stageInfo:StageInfo):
+        self._owner:typing.Optional['Projects']=None
         UIRepresentation.__init__(self) # TODO: add my template
         self.settings:Settings=settings
         self.stageInfo:StageInfo=stageInfo
@@ -43,7 +55,21 @@ class Project(UIRepresentation):
         self.stagePercent:float=0
         self.desiredETA:datetime.datetime=None
         self.blockedBy:typing.List[str]=None
-        self.documentLocation:URL=None
+        self.documentLocation:'URL'=None
+
+    def __setattr__(self,k:str,v:typing.Any)->None:
+        """
+        lets whoever is watching (usually Projects) know
+        when a saved field changes
+        """
+        owner=self.__dict__.get('_owner')
+        if owner is None or k not in self._WATCHED:
+            object.__setattr__(self,k,v)
+            return
+        old=self.__dict__.get(k)
+        object.__setattr__(self,k,v)
+        if old!=v:
+            owner._projectChanged(self,k,old) # pylint: disable=protected-access # noqa: E501
 
     @property
     def title(self)->str:
@@ -61,6 +87,7 @@ class Project(UIRepresentation):
         return self.stageInfo[self.stage]
 
     @property
+    @timed()
     def totalPercent(self)->float:
         """
         percent of the total project that is currently complete
@@ -68,6 +95,7 @@ class Project(UIRepresentation):
         return 1-self.totalHoursRemaining/self.stageInfo.totalHours
 
     @property
+    @timed()
     def hoursRemainingInStage(self)->int:
         """
         how many hours remain in the current stage we are on
@@ -75,27 +103,43 @@ class Project(UIRepresentation):
         return self.currentStageInfo.totalHours*(1-self.stagePercent)
 
     @property
+    @timed()
     def totalHoursRemaining(self)->int:
         """
         how many hours remain
         """
         hours=self.hoursRemainingInStage
-        for stageNum in range(int(self.stage)-1):
+        for stageNum in range(int(self.stage)+1,len(self.stageInfo)):
             hours+=self.stageInfo[stageNum].totalHours
         return hours
 
     @property
+    @timed()
+    def upstreamHours(self)->float:
+        """
+        how many hours of other projects we have to wait on
+        (see blockedBy)
+        """
+        if self._owner is None:
+            return 0
+        return self._owner.dependencies.upstreamHours(self)
+
+    @property
+    @timed()
     def ETA(self)->datetime.datetime:
         """
         the current estimate for when this will be completed
+        (including waiting on any projects it is blocked by)
         """
         if isinstance(self.settings.workingHoursPerDayPerBook,str):
             self.settings.workingHoursPerDayPerBook=\
                 self.settings.workingHoursPerDayPerBook
-        hours=self.totalHoursRemaining/self.settings.workingHoursPerDayPerBook
+        hours=(self.totalHoursRemaining+self.upstreamHours)\
+            /self.settings.workingHoursPerDayPerBook
         return datetime.datetime.now()+datetime.timedelta(hours=hours)
 
     @property
+    @timed()
     def stageGoal(self)->str:
         """
         the goal for the current stage
@@ -103,6 +147,7 @@ class Project(UIRepresentation):
         return self.currentStageInfo.goal
 
     @property
+    @timed()
     def daysAhead(self)->int:
         """
         Returns positive number of days ahead of schedule you are.
@@ -114,6 +159,37 @@ class Project(UIRepresentation):
             return 0
         return (self.desiredETA-self.ETA).days
 
+    def formatField(self,k:str)->str:
+        """
+        get the value of a saved field, formatted the way
+        it is written to the projects file
+        """
+        v=getattr(self,k)
+        if v is None:
+            return ''
+        if isinstance(v,datetime.datetime):
+            return v.strftime('%m/%d/%y')
+        return str(v)
+
+    @classmethod
+    def parseField(cls,k:str,v:typing.Any)->typing.Any:
+        """
+        convert a value (usually a string from the ui or command line)
+        into the proper type for a saved field
+        """
+        if not isinstance(v,str):
+            return v
+        v=v.strip()
+        if not v and k not in ('activeStatus','workingTitle'):
+            return None
+        return cls.FIELD_FORMAT[cls.SAVE_FIELDS.index(k)](v)
+
+    def toDict(self)->typing.Dict[str,typing.Any]:
+        """
+        the saved fields of this project as a dict
+        """
+        return {k:getattr(self,k) for k in self.SAVE_FIELDS}
+
     def open(self)->None:
         """
         open the main project file using the associated os program
@@ -147,15 +223,236 @@ class Project(UIRepresentation):
         return '\n'.join(ret)
 
 
+class ProjectsBatch:
+    """
+    A group of changes to Projects that is applied all at once,
+    with a single recompute of everything derived and a single save.
+
+    If anything goes wrong inside the batch, all of its changes
+    are rolled back.
+
+    Usage:
+        with projects.batch() as batch:
+            batch.set(project,'priority',3)
+            batch.setWhere({'series':'Dragons'},{'activeStatus':'shelved'})
+    """
+
+    def __init__(self,projects:'Projects',save:bool=True):
+        self.projects:'Projects'=projects
+        self.save:bool=save
+        # {project:{fieldName:originalValue}}
+        self.changes:typing.Dict[Project,typing.Dict[str,typing.Any]]={}
+
+    def _changed(self,project:Project,k:str,old:typing.Any)->None:
+        """
+        record a change (called by the project itself)
+        """
+        self.changes.setdefault(project,{}).setdefault(k,old)
+
+    def set(self,project:Project,k:str,v:typing.Any)->None:
+        """
+        change a saved field on a project
+        """
+        if k not in Project.SAVE_FIELDS:
+            raise Exception('Unknown field "'+k+'"')
+        setattr(project,k,Project.parseField(k,v))
+
+    def setWhere(self,
+        filters:typing.Dict[str,typing.Any],
+        changes:typing.Dict[str,typing.Any]
+        )->typing.List[Project]:
+        """
+        change saved fields on every project matching the filters
+
+        returns the projects that matched
+        """
+        changes={k:Project.parseField(k,v) for k,v in changes.items()}
+        matched=self.projects.filter(**filters)
+        for project in matched:
+            for k,v in changes.items():
+                self.set(project,k,v)
+        return matched
+
+    def rollback(self)->None:
+        """
+        put everything back the way it was
+        """
+        index=self.projects.index
+        for project,fields in self.changes.items():
+            for k,v in fields.items():
+                current=getattr(project,k)
+                object.__setattr__(project,k,v)
+                index.update(project,k,current)
+        self.changes={}
+
+    def __enter__(self)->'ProjectsBatch':
+        if self.projects._batch is not None: # pylint: disable=protected-access # noqa: E501
+            raise Exception('A batch is already in progress.')
+        self.projects._batch=self # pylint: disable=protected-access
+        return self
+
+    def __exit__(self,excType,excValue,traceback)->None:
+        self.projects._batch=None # pylint: disable=protected-access
+        if excType is not None:
+            self.rollback()
+            return
+        if not self.changes:
+            return
+        self.projects._projectsChanged(self.changes) # pylint: disable=protected-access # noqa: E501
+        if self.save:
+            self.projects.saveProjects()
+
+
 class Projects:
     """
     A set of projects
     """
 
-    def __init__(self,settings:Settings,stageInfo:StageInfos):
+    def __init__(self,
+        settings:Settings,
+        stageInfo:StageInfos,
+        location:'URLCompatible'='projects.csv'):
+        #
         self.settings:Settings=settings
         self.stageInfo:StageInfos=stageInfo
-        self.loadProjects()
+        self.location:'URLCompatible'=location
+        self._batch:typing.Optional[ProjectsBatch]=None
+        self.index:ProjectIndex=ProjectIndex(Project.SAVE_FIELDS)
+        self.series:typing.Dict[str,Series]={}
+        self.dependencies:DependencyGraph=DependencyGraph(self)
+        # {keptLocation:[duplicateLocations]} from the last scanProjects()
+        self.lastScanDuplicates:typing.Dict[str,typing.List[str]]={}
+        # called with the same changes as _projectsChanged()
+        # (or None when everything is reloaded)
+        self.changeListeners:typing.List[typing.Callable[
+            [typing.Optional[typing.Dict[Project,typing.Dict[str,typing.Any]]]], # noqa: E501 # pylint: disable=line-too-long
+            None]]=[]
+        self.loadProjects(location)
+
+    def _projectChanged(self,project:Project,k:str,old:typing.Any)->None:
+        """
+        called by a project whenever one of its saved fields changes
+
+        The index is kept up to date right away (it is cheap, and
+        anything reading it inside a batch must see the change), while
+        everything else waits until the end of the batch.
+        """
+        self.index.update(project,k,old)
+        if self._batch is not None:
+            self._batch._changed(project,k,old) # pylint: disable=protected-access # noqa: E501
+        else:
+            self._projectsChanged({project:{k:old}})
+
+    def _projectsChanged(self,
+        changes:typing.Dict[Project,typing.Dict[str,typing.Any]]
+        )->None:
+        """
+        bring everything derived from the projects up to date
+        after some of them have changed
+
+        This is called once per batch (or once per lone change)
+        and should only cost as much as the changes themselves.
+        (The index has already been updated by _projectChanged.)
+
+        :param changes: {project:{fieldName:originalValue}}
+        """
+        for project,fields in changes.items():
+            if 'series' in fields:
+                self._leaveSeries(project,fields['series'])
+                self._joinSeries(project)
+            elif not CONTRIBUTING_FIELDS.isdisjoint(fields):
+                if project.series:
+                    self.series[project.series].update(project)
+            if 'blockedBy' in fields or 'workingTitle' in fields:
+                self.dependencies.structureChanged()
+            elif 'stage' in fields or 'stagePercent' in fields:
+                self.dependencies.hoursChanged()
+        for listener in self.changeListeners:
+            listener(changes)
+
+    def _reindex(self)->None:
+        """
+        rebuild everything derived from the projects from scratch
+        (after loading)
+        """
+        self.index.rebuild(self.projects)
+        self.dependencies.structureChanged()
+        self.series={}
+        for project in self.projects:
+            self._joinSeries(project)
+        for listener in self.changeListeners:
+            listener(None)
+
+    def _joinSeries(self,project:Project)->None:
+        """
+        add a project to the rollup for its series
+        """
+        if not project.series:
+            return
+        series=self.series.get(project.series)
+        if series is None:
+            series=Series(project.series,self.settings,self.dependencies)
+            self.series[project.series]=series
+        series.add(project)
+
+    def _leaveSeries(self,project:Project,seriesName:str)->None:
+        """
+        remove a project from the rollup of a series it used to be in
+        """
+        series=self.series.get(seriesName) if seriesName else None
+        if series is None:
+            return
+        series.remove(project)
+        if not series:
+            del self.series[seriesName]
+
+    def batch(self,save:bool=True)->ProjectsBatch:
+        """
+        start a batch of changes to be applied all at once
+
+        :param save: save the projects once the batch is done
+        """
+        return ProjectsBatch(self,save)
+
+    def filter(self,**filters)->typing.List[Project]:
+        """
+        get all projects whose saved fields match the given values
+
+        values may be strings, in which case they are converted
+        the same way as when loaded from file
+            eg: projects.filter(series='Dragons',activeStatus='active')
+        """
+        for k in filters:
+            if k not in Project.SAVE_FIELDS:
+                raise Exception('Unknown field "'+k+'"')
+        return self.query(Query([
+            Condition(k,'=',Project.parseField(k,v))
+            for k,v in filters.items()]))
+
+    @timed()
+    def query(self,query:typing.Union[str,Query])->typing.List[Project]:
+        """
+        get a filtered, sorted view of the projects, eg:
+            projects.query('series=Dragons,stage>=3,sort=-priority,limit=5')
+
+        See also: query.py
+        """
+        if isinstance(query,str):
+            query=Query.parse(query)
+        return query.run(self.projects,self.index)
+
+    def updateWhere(self,
+        filters:typing.Dict[str,typing.Any],
+        changes:typing.Dict[str,typing.Any]
+        )->typing.List[Project]:
+        """
+        change saved fields on every project matching the filters,
+        with a single recompute and a single save
+
+        returns the projects that matched
+        """
+        with self.batch() as batch:
+            return batch.setWhere(filters,changes)
 
     def _unCamel(self,title:str)->str:
         """
@@ -171,7 +468,7 @@ class Projects:
             if lastLower!=letter.isupper():
                 t2.append(' ')
             t2.append(letter)
-        return ''.join(t2)
+        return ''.join(t2).strip()
 
     def _makeComparable(self,s:str)->str:
         """
@@ -189,7 +486,10 @@ class Projects:
             return True
         return self._makeComparable(title1)==self._makeComparable(title2)
 
-    def _projectFromFile(self,path:URLCompatible,seriesHint:str=None)->Project:
+    def _projectFromFile(self,
+        path:'URLCompatible',
+        seriesHint:str=None
+        )->Project:
         """
         create a project object based on an editor file
 
@@ -212,62 +512,120 @@ class Projects:
         return project
 
     def _directoryLooksLikeProject(self,
-        directory:URLCompatible,
+        directory:'URLCompatible',
         seriesHint:str=None
-        )->bool:
+        )->typing.Optional[Project]:
         """
         Determines if the directory looks like a project.
 
         If so, returns a filled out project object.  If not, returns None.
-        """
-        foundFile=None
-        foundPriority=1000
-        writingFileExtensions=(
-            'msk','celtx','odt','doc','docx') # in priority order!
-        for filename in os.listdir(directory):
-            fullPath=directory+os.sep+filename # make it into a full path
-            if not os.path.isfile(fullPath):
-                continue
-            ext=filename.rsplit('.',1)
-            if len(ext)<2:
-                continue
-            try:
-                idx=writingFileExtensions.index(ext[1])
-            except ValueError:
-                continue
-            if idx<foundPriority:
-                foundFile=fullPath
-                foundPriority=idx
-            elif idx==foundPriority: # if they are the same extension, go with the newest # noqa: E501 # pylint: disable=line-too-long
-                if os.path.getmtime(foundFile)<os.path.getmtime(fullPath):
-                    foundFile=fullPath
-        if foundFile is not None:
-            foundFile=self._projectFromFile(foundFile,seriesHint)
-        return foundFile
-
-    def _directoryLooksLikeSeries(self,directory:URLCompatible)->bool:
+
+        This is done in one pass that only looks at file names, so
+        folders full of images and backups cost nothing extra.  Only
+        files with a writing extension are checked for being files
+        (which is usually free with scandir), and only files tying for
+        the best extension are stat'ed, to find the newest.
+        """
+        extensions=self.settings.writingFileExtensions # {ext:priority}
+        foundEntry=None
+        foundPriority=len(extensions)
+        foundMtime=None
+        try:
+            entries=os.scandir(directory)
+        except OSError:
+            return None
+        with entries:
+            for entry in entries:
+                name=entry.name
+                dot=name.rfind('.')
+                if dot<0:
+                    continue
+                priority=extensions.get(name[dot+1:].lower())
+                if priority is None or priority>foundPriority:
+                    continue
+                if not entry.is_file():
+                    continue
+                if priority<foundPriority:
+                    foundEntry=entry
+                    foundPriority=priority
+                    foundMtime=None
+                else: # if they are the same extension, go with the newest
+                    if foundMtime is None:
+                        foundMtime=foundEntry.stat().st_mtime
+                    mtime=entry.stat().st_mtime
+                    if mtime>foundMtime:
+                        foundEntry=entry
+                        foundMtime=mtime
+        if foundEntry is None:
+            return None
+        return self._projectFromFile(
+            directory+os.sep+foundEntry.name,seriesHint)
+
+    def _seriesNameFor(self,directory:'URLCompatible')->str:
+        """
+        the series name implied by a directory's name
+        """
+        return self._unCamel(
+            directory\
+            .rsplit(os.sep,1)[-1]\
+            .rsplit('.',1)[0]\
+            .strip())
+
+    def _directoryLooksLikeSeries(self,
+        directory:'URLCompatible',
+        relPath:str='',
+        rules:typing.Optional[IgnoreRules]=None,
+        levels:int=1
+        )->typing.List[Project]:
         """
         Determines if the directory looks like a series.
 
         That is, a directory containing subdirectories that look like projects.
 
+        :param levels: how many levels of subdirectories to look in
+            (more than 1 allows for series within series)
+
         returns an array of filled out project objects.
             It is empty if it isn't a series.
         """
-        foundProjects=[]
-        seriesHint=self._unCamel(
-            directory\
-            .rsplit(os.sep,1)[-1]\
-            .rsplit('.',1)[0]\
-            .strip())
-        for d in os.listdir(directory):
-            d=directory+os.sep+d # make it into a full path
-            if not os.path.isdir(d):
+        return list(self._walkForProjects(directory,relPath,
+            self._seriesNameFor(directory),rules,levels))
+
+    def _walkForProjects(self,
+        directory:'URLCompatible',
+        relPath:str,
+        seriesHint:typing.Optional[str],
+        rules:typing.Optional[IgnoreRules],
+        levels:int
+        )->typing.Generator[Project,None,None]:
+        """
+        look for projects in the subdirectories of a directory
+
+        Anything that isn't a project itself is looked into as a series,
+        for as many levels as allowed.  Ignored directories are pruned
+        before ever being entered.
+
+        :param relPath: directory relative to the projects directory
+            (with / separators) for matching the ignore rules
+        :param levels: how many levels of subdirectories to go down
+        """
+        try:
+            entries=os.scandir(directory)
+        except OSError:
+            return
+        with entries:
+            subdirectories=[entry for entry in entries if entry.is_dir()]
+        for entry in subdirectories:
+            subRelPath=relPath+'/'+entry.name if relPath else entry.name
+            if rules and rules.ignored(subRelPath,True):
                 continue
+            d=directory+os.sep+entry.name # make it into a full path
             project=self._directoryLooksLikeProject(d,seriesHint)
             if project is not None:
-                foundProjects.append(project)
-        return foundProjects
+                yield project
+            elif levels>1:
+                yield from self._directoryLooksLikeSeries(d,subRelPath,
+                    rules,levels-1)
 
     def _findProjects(self)->typing.Generator[Project,None,None]:
         """
@@ -275,24 +633,61 @@ class Projects:
             projectsDirectory=value
             (if not set, this defaults to the "my documents" schtick)
 
+        only goes scanMaxDepth directories deep, and skips anything
+        matching scanIgnore or the projects directory's .dashboardignore
+
         returns [Project] that can be matched by name
             with existing Project objects
         """
-        for d in os.listdir(self.settings.projectsDirectory):
-            d=self.settings.projectsDirectory+os.sep+d # make it into a full path # noqa: E501 # pylint: disable=line-too-long
-            if not os.path.isdir(d):
-                continue
-            project=self._directoryLooksLikeProject(d,None)
-            if project is not None:
-                yield project
-            else:
-                pass #foundProjects.extend(self._directoryLooksLikeSeries(d))
-
+        if self.settings.scanMaxDepth<1:
+            raise Exception('scanMaxDepth must be at least 1 (projects directly in projectsDirectory), not '+str(self.settings.scanMaxDepth)) # noqa: E501 # pylint: disable=line-too-long
+        rules=IgnoreRules.forSettings(self.settings)
+        yield from self._walkForProjects(self.settings.projectsDirectory,'',
+            None,rules,self.settings.scanMaxDepth)
+
+    def _collapseDuplicates(self,
+        newProjects:typing.List[Project],
+        linked:typing.Iterable['URL']=()
+        )->typing.List[Project]:
+        """
+        drop new projects whose document is a byte-for-byte copy
+        of another one (or of one already in the database)
+
+        Only projects that didn't match anything in the database should
+        be passed in, so a file that is the only candidate for an
+        existing project is never dropped just for looking like another.
+
+        :param linked: documents about to be linked to existing projects
+            (which count the same as those already in the database)
+
+        Of each set of copies, the one already in the database is kept,
+        otherwise the first one found.  What was dropped ends up in
+        self.lastScanDuplicates.
+        """
+        known=[p.documentLocation for p in self.projects
+            if p.documentLocation is not None]
+        known.extend(linked)
+        knownSet=set(known)
+        found=[p.documentLocation for p in newProjects]
+        dropped=set()
+        self.lastScanDuplicates={}
+        for group in findDuplicates(known+found):
+            keep=group[0] # known locations come first
+            duplicates=[location for location in group[1:]
+                if location not in knownSet]
+            if duplicates:
+                self.lastScanDuplicates[keep]=duplicates
+                dropped.update(duplicates)
+        if not dropped:
+            return newProjects
+        return [p for p in newProjects if p.documentLocation not in dropped]
+
+    @timed()
     def scanProjects(self
         )->typing.Tuple[
             typing.List[Project],
             typing.List[Project],
-            typing.List[typing.Tuple[Project,URL]]
+            typing.List[typing.Tuple[Project,'URL']]
         ]:
         """
         scan the projects directory specified in the settings.ini
@@ -304,12 +699,16 @@ class Projects:
             * new projects that can be added
             * projects that can be linked to those already in the database
 
+        new projects that are copies of the same manuscript (or of one
+            already in the database) are collapsed into one
+            (see lastScanDuplicates for what was left out)
+
         returns ([missingProjects],[newProjects],[(project,suggestedFile)])
         """
         foundProjects:typing.List[Project]=list(self._findProjects())
         missingProjects:typing.List[Project]=[]
         newProjects:typing.List[Project]=[]
-        suggestedLinks:typing.List[typing.Tuple[Project,URL]]=[]
+        suggestedLinks:typing.List[typing.Tuple[Project,'URL']]=[]
         for p in self.projects:
             if p.documentLocation is None \
                 or not os.path.exists(p.documentLocation): # noqa: E129
@@ -336,10 +735,48 @@ class Projects:
                     break
             if not matched:
                 newProjects.append(p)
+        newProjects=self._collapseDuplicates(newProjects,
+            [location for _,location in suggestedLinks])
         return missingProjects,newProjects,suggestedLinks
 
+    @timed()
+    def refreshFromManuscripts(self)->typing.List[Project]:
+        """
+        update currentWords from every project's Manuskript (.msk) file
+
+        If a scene status in the manuscript has the same name as the
+        project's current stage, stagePercent is updated too, to the
+        fraction of scenes that have reached that status.
+
+        Scene-by-scene indexes are kept next to projects.csv, so only
+        the scenes that changed since last time are read.
+
+        returns the projects that changed
+        """
+        indexes=ManuskriptIndexes(os.path.join(
+            os.path.dirname(self.location),CACHE_FILENAME))
+        with self.batch() as batch:
+            for p in self.projects:
+                location=p.documentLocation
+                if not location or not location.lower().endswith(MSK_EXTENSION): # noqa: E501 # pylint: disable=line-too-long
+                    continue
+                index=indexes.get(location)
+                try:
+                    index.refresh()
+                except (OSError,zipfile.BadZipFile) as e:
+                    print('ERR: unable to read',location,e)
+                    continue
+                batch.set(p,'currentWords',index.words)
+                fraction=index.fractionAtStatus(str(p.currentStageInfo.name))
+                if fraction is not None:
+                    batch.set(p,'stagePercent',fraction)
+            changed=list(batch.changes)
+        indexes.save()
+        return changed
+
+    @timed()
     def loadProjects(self,
-        location:URLCompatible='projects.csv',
+        location:'URLCompatible'='projects.csv',
         split_char:str=','
         )->None:
         """
@@ -348,7 +785,7 @@ class Projects:
         """
         self.projects=[]
         header=None
-        f=open(location,'rb')
+        f=open(location,'r',encoding='utf-8')
         lineNo=1
         for line in f:
             line=line.strip()
@@ -361,7 +798,7 @@ class Projects:
                         h=h.strip().replace(' ','').replace(r'%','Percent')
                         try:
                             idx=Project.SAVE_FIELDS.index(h)
-                        except AttributeError:
+                        except ValueError:
                             print(f'Skipping column "{h}"')
                             header.append(None)
                             fmts.append(None)
@@ -382,29 +819,38 @@ class Projects:
                                 #   expected',fmts[i].__class__,
                                 #   'for column',header[i],
                                 #   'but got "'+line[i]+'" instead.')
+                    proj._owner=self # pylint: disable=protected-access
                     self.projects.append(proj)
             lineNo+=1
+        f.close()
+        self._reindex()
 
+    @timed()
     def saveProjects(self,
-        location:URLCompatible='projects.csv',
+        location:'URLCompatible'=None,
         split_char:str=','
         )->None:
         """
+        :param location: where to save to (default is where we loaded from)
+
         TODO: data should be able to live in
             a spreadsheet, google doc, whatever
         """
-        f=open(location,'wb')
+        if location is None:
+            location=self.location
+        f=open(location,'w',encoding='utf-8')
         f.write(split_char.join(Project.SAVE_FIELDS))
         f.write('\n')
         for p in self.projects:
             line=[]
             for k in Project.SAVE_FIELDS:
-                line.append(str(getattr(p,k)))
+                line.append(p.formatField(k))
             f.write(split_char.join(line))
             f.write('\n')
         f.flush()
         f.close()
 
+    @timed()
     def getByName(self,name:str)->Project:
         """
         If this doesn't match exactly one project, raises an exception
@@ -431,6 +877,7 @@ class Projects:
             return found
         raise Exception('Unable to find matching project.')
 
+    @timed()
     def top(self,n:int=1)->typing.List[Project]:
         """
         Get the top priority project(s) in terms of priority*10+daysAhead
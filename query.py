@@ -0,0 +1,396 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Filtered, sorted views of projects, backed by secondary indexes
+
+A query is written like:
+    series=Dragons,activeStatus=active,stage>=3,daysAhead<0,sort=-priority,limit=10
+
+Conditions on saved fields are answered from the indexes.
+Conditions on computed values (daysAhead, ETA, etc) can't be indexed
+because they change with the clock, so they are only checked against
+whatever the indexed conditions leave over.
+"""
+import typing
+import re
+import bisect
+import operator
+if typing.TYPE_CHECKING:
+    from .projects import Project
+
+
+def _key(v:typing.Any)->typing.Any:
+    """
+    the index key for a value
+
+    (blank and missing are considered the same thing)
+    """
+    if v=='':
+        return None
+    return v
+
+
+class ProjectIndex:
+    """
+    Secondary indexes over the saved fields of a set of projects
+
+    For every field there is a {value:set(projects)} lookup, and for
+    fields with orderable values, a sorted list of the distinct values
+    so that ranges and sorting only need to touch the buckets involved.
+    """
+
+    def __init__(self,fields:typing.Iterable[str]):
+        self.fields:typing.List[str]=list(fields)
+        self.lookup:typing.Dict[str,typing.Dict[typing.Any,typing.Set['Project']]]={} # noqa: E501 # pylint: disable=line-too-long
+        self.sortedKeys:typing.Dict[str,typing.List[typing.Any]]={}
+        self.position:typing.Dict['Project',int]={}
+        self.clear()
+
+    def clear(self)->None:
+        """
+        empty out all indexes
+        """
+        self.lookup={k:{} for k in self.fields}
+        self.sortedKeys={k:[] for k in self.fields}
+        self.position={}
+
+    def rebuild(self,projects:typing.Iterable['Project'])->None:
+        """
+        rebuild all indexes from scratch
+        """
+        self.clear()
+        for i,project in enumerate(projects):
+            self.position[project]=i
+            for k in self.fields:
+                self._add(k,_key(getattr(project,k)),project)
+
+    def _add(self,k:str,key:typing.Any,project:'Project')->None:
+        bucket=self.lookup[k].get(key)
+        if bucket is None:
+            bucket=set()
+            self.lookup[k][key]=bucket
+            if key is not None:
+                try:
+                    bisect.insort(self.sortedKeys[k],key)
+                except TypeError: # values that can't be ordered
+                    self.sortedKeys[k]=None
+        bucket.add(project)
+
+    def _remove(self,k:str,key:typing.Any,project:'Project')->None:
+        bucket=self.lookup[k].get(key)
+        if bucket is None:
+            return
+        bucket.discard(project)
+        if not bucket:
+            del self.lookup[k][key]
+            keys=self.sortedKeys[k]
+            if key is not None and keys is not None:
+                i=bisect.bisect_left(keys,key)
+                if i<len(keys) and keys[i]==key:
+                    del keys[i]
+
+    def update(self,
+        project:'Project',
+        k:str,
+        old:typing.Any
+        )->None:
+        """
+        move a project from the old value's bucket to its current one
+        """
+        if k not in self.lookup:
+            return
+        self._remove(k,_key(old),project)
+        self._add(k,_key(getattr(project,k)),project)
+
+    def equal(self,k:str,v:typing.Any)->typing.Set['Project']:
+        """
+        all projects where field k equals v
+        """
+        return self.lookup[k].get(_key(v),set())
+
+    def ordered(self,k:str)->bool:
+        """
+        can ranges and sorting on this field be answered by the index?
+        """
+        return self.sortedKeys.get(k) is not None
+
+    def range(self,
+        k:str,
+        low:typing.Any=None,
+        high:typing.Any=None,
+        includeLow:bool=True,
+        includeHigh:bool=True
+        )->typing.Set['Project']:
+        """
+        all projects where low <= field k <= high
+        (either end may be left open by passing None)
+        """
+        keys=self.sortedKeys[k]
+        start=0
+        end=len(keys)
+        if low is not None:
+            start=(bisect.bisect_left if includeLow else bisect.bisect_right)(keys,low) # noqa: E501 # pylint: disable=line-too-long
+        if high is not None:
+            end=(bisect.bisect_right if includeHigh else bisect.bisect_left)(keys,high) # noqa: E501 # pylint: disable=line-too-long
+        ret=set()
+        for key in keys[start:end]:
+            ret.update(self.lookup[k][key])
+        return ret
+
+    def buckets(self,
+        k:str,
+        descending:bool=False
+        )->typing.Iterator[typing.Set['Project']]:
+        """
+        walk the projects in order of field k, one bucket of equal values
+        at a time (missing values come last)
+        """
+        keys=self.sortedKeys[k]
+        for key in (reversed(keys) if descending else keys):
+            yield self.lookup[k][key]
+        missing=self.lookup[k].get(None)
+        if missing:
+            yield missing
+
+
+class Condition:
+    """
+    A single condition in a query, such as stage>=3
+    """
+
+    OPERATORS:typing.Dict[str,typing.Callable[[typing.Any,typing.Any],bool]]={ # noqa: E501 # pylint: disable=line-too-long
+        '=':operator.eq,'!=':operator.ne,
+        '<':operator.lt,'<=':operator.le,
+        '>':operator.gt,'>=':operator.ge}
+
+    def __init__(self,field:str,op:str,value:typing.Any):
+        if op not in self.OPERATORS:
+            raise Exception('Unknown operator "'+op+'"')
+        self.field:str=field
+        self.op:str=op
+        self.value:typing.Any=value
+
+    def matches(self,project:'Project')->bool:
+        """
+        check a single project against this condition
+        """
+        v=_key(getattr(project,self.field))
+        if v is None or self.value is None:
+            if self.op=='=':
+                return v is self.value
+            if self.op=='!=':
+                return v is not self.value
+            return False
+        try:
+            return self.OPERATORS[self.op](v,self.value)
+        except TypeError:
+            return False
+
+    def lookup(self,index:ProjectIndex)->typing.Optional[typing.Set['Project']]: # noqa: E501 # pylint: disable=line-too-long
+        """
+        answer this condition from the index
+
+        returns None if the index can't answer it
+        """
+        if self.field not in index.lookup:
+            return None
+        if self.op=='=':
+            return index.equal(self.field,self.value)
+        if self.op=='!=' or self.value is None \
+            or not index.ordered(self.field): # noqa: E129
+            #
+            return None
+        if self.op in ('<','<='):
+            return index.range(self.field,
+                high=self.value,includeHigh=self.op=='<=')
+        return index.range(self.field,
+            low=self.value,includeLow=self.op=='>=')
+
+    def __repr__(self)->str:
+        return self.field+self.op+('' if self.value is None else str(self.value)) # noqa: E501 # pylint: disable=line-too-long
+
+
+class Query:
+    """
+    A filtered, sorted, limited view of projects
+    """
+
+    COMPUTED_FIELDS:typing.List[str]=[
+        'title','totalPercent','hoursRemainingInStage',
+        'totalHoursRemaining','ETA','stageGoal','daysAhead']
+
+    _TERM=re.compile(r'^\s*(\w+)\s*(<=|>=|!=|=|<|>)\s*(.*?)\s*$')
+
+    def __init__(self,
+        conditions:typing.Iterable[Condition]=(),
+        sort:typing.Iterable[str]=(),
+        limit:typing.Optional[int]=None):
+        """
+        :param sort: field names, prefixed with - for descending
+        """
+        self.conditions:typing.List[Condition]=list(conditions)
+        self.sort:typing.List[str]=list(sort)
+        self.limit:typing.Optional[int]=limit
+
+    @classmethod
+    def _parseValue(cls,field:str,value:str)->typing.Any:
+        """
+        convert a value from query text into the field's type
+        """
+        from .projects import Project
+        if field in Project.SAVE_FIELDS:
+            return Project.parseField(field,value)
+        if field not in cls.COMPUTED_FIELDS:
+            raise Exception('Unknown field "'+field+'"')
+        if not value:
+            return None
+        if field=='ETA':
+            return Project.parseField('desiredETA',value)
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+    @classmethod
+    def parse(cls,text:str)->'Query':
+        """
+        parse the text form of a query, eg:
+            series=Dragons,stage>=3,daysAhead<0,sort=-priority,limit=10
+        """
+        query=cls()
+        for term in text.split(','):
+            if not term.strip():
+                continue
+            m=cls._TERM.match(term)
+            if m is None:
+                raise Exception('Unable to understand query term "'+term+'"')
+            field,op,value=m.groups()
+            if field=='sort' and op=='=':
+                query.sort.extend(s.strip() for s in value.split('|'))
+            elif field=='limit' and op=='=':
+                query.limit=int(value)
+            else:
+                query.conditions.append(
+                    Condition(field,op,cls._parseValue(field,value)))
+        for s in query.sort:
+            cls._parseValue(s.lstrip('-'),'') # make sure the field exists
+        return query
+
+    def _candidates(self,
+        projects:typing.Sequence['Project'],
+        index:ProjectIndex
+        )->typing.Tuple[typing.Set['Project'],typing.List[Condition]]:
+        """
+        narrow things down as far as possible using the index
+
+        returns (candidates,conditions that still need checking)
+        """
+        found:typing.List[typing.Set['Project']]=[]
+        remaining:typing.List[Condition]=[]
+        for condition in self.conditions:
+            hits=condition.lookup(index)
+            if hits is None:
+                remaining.append(condition)
+            else:
+                found.append(hits)
+        if not found:
+            return set(projects),remaining
+        found.sort(key=len) # intersect smallest first
+        candidates=set(found[0])
+        for hits in found[1:]:
+            candidates.intersection_update(hits)
+            if not candidates:
+                break
+        return candidates,remaining
+
+    def run(self,
+        projects:typing.Sequence['Project'],
+        index:ProjectIndex
+        )->typing.List['Project']:
+        """
+        run the query over a set of projects and their index
+        """
+        candidates,remaining=self._candidates(projects,index)
+        if remaining:
+            candidates={p for p in candidates
+                if all(c.matches(p) for c in remaining)}
+        position=index.position.get
+
+        def catalogOrder(p:'Project')->int:
+            return position(p,0)
+
+        if not self.sort:
+            ret=sorted(candidates,key=catalogOrder)
+            return ret if self.limit is None else ret[0:self.limit]
+        primary=self.sort[0].lstrip('-')
+        descending=self.sort[0].startswith('-')
+        if not index.ordered(primary):
+            ret=sorted(candidates,key=catalogOrder)
+            for s in reversed(self.sort):
+                ret=self._sortBy(ret,s)
+            return ret if self.limit is None else ret[0:self.limit]
+        # let the index do the sorting, one bucket at a time
+        ret=[]
+        for bucket in index.buckets(primary,descending):
+            hits=sorted(candidates.intersection(bucket),key=catalogOrder)
+            for s in reversed(self.sort[1:]):
+                hits=self._sortBy(hits,s)
+            ret.extend(hits)
+            if self.limit is not None and len(ret)>=self.limit:
+                return ret[0:self.limit]
+        return ret
+
+    @staticmethod
+    def _sortBy(projects:typing.List['Project'],s:str)->typing.List['Project']: # noqa: E501 # pylint: disable=line-too-long
+        """
+        stable sort by a single field, missing values last
+        """
+        field=s.lstrip('-')
+        descending=s.startswith('-')
+        present=[]
+        missing=[]
+        for p in projects:
+            (missing if _key(getattr(p,field)) is None else present).append(p)
+        present.sort(key=lambda p:getattr(p,field),reverse=descending)
+        return present+missing
+
+    def __repr__(self)->str:
+        ret=[str(c) for c in self.conditions]
+        if self.sort:
+            ret.append('sort='+'|'.join(self.sort))
+        if self.limit is not None:
+            ret.append('limit='+str(self.limit))
+        return ','.join(ret)
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                elif kv[0]=='--parse':
+                    print(Query.parse(kv[1]))
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  query.py [options]')
+        print('Options:')
+        print('   --parse=query ........ check how a query is understood')
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
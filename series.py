@@ -0,0 +1,216 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Juggle info about series of projects
+"""
+import typing
+import datetime
+from .settings import Settings
+if typing.TYPE_CHECKING:
+    from .projects import Project
+    from .dependencies import DependencyGraph
+
+
+# the saved fields that feed into a project's contribution to its series
+CONTRIBUTING_FIELDS:typing.FrozenSet[str]=frozenset((
+    'currentWords','targetWords','stage','stagePercent','blockedBy'))
+
+
+class Contribution(typing.NamedTuple):
+    """
+    What a single project adds to its series' totals
+    """
+    currentWords:int
+    targetWords:int
+    hoursRemaining:float
+    blocked:int
+
+    @classmethod
+    def of(cls,project:'Project')->'Contribution':
+        """
+        work out what a project currently contributes
+        """
+        return cls(
+            project.currentWords or 0,
+            project.targetWords or 0,
+            project.totalHoursRemaining,
+            1 if project.blockedBy else 0)
+
+
+class Series:
+    """
+    Rolled-up totals for all the projects in a series
+
+    Totals are adjusted as each member changes, rather than being
+    added up again every time somebody looks at them.
+    """
+
+    def __init__(self,
+        name:str,
+        settings:Settings,
+        dependencies:typing.Optional['DependencyGraph']=None):
+        """
+        :param dependencies: the graph of what is blocked by what, so that
+            latestETA counts the time members spend waiting on others
+        """
+        self.name:str=name
+        self.settings:Settings=settings
+        self.dependencies:typing.Optional['DependencyGraph']=dependencies
+        self.members:typing.Dict['Project',Contribution]={}
+        self.currentWords:int=0
+        self.targetWords:int=0
+        self.totalHoursRemaining:float=0
+        self.blockedCount:int=0
+        self._maxHoursRemaining:typing.Optional[float]=0
+        # (dependencies.version,hours) for maxFinishHours
+        self._maxFinishHours:typing.Optional[typing.Tuple[int,float]]=None
+
+    def _apply(self,contribution:Contribution,sign:int)->None:
+        self.currentWords+=sign*contribution.currentWords
+        self.targetWords+=sign*contribution.targetWords
+        self.totalHoursRemaining+=sign*contribution.hoursRemaining
+        self.blockedCount+=sign*contribution.blocked
+
+    def add(self,project:'Project')->None:
+        """
+        add a project to the series
+        """
+        if project in self.members:
+            self.update(project)
+            return
+        contribution=Contribution.of(project)
+        self.members[project]=contribution
+        self._apply(contribution,1)
+        self._maxFinishHours=None
+        if self._maxHoursRemaining is not None:
+            self._maxHoursRemaining=max(
+                self._maxHoursRemaining,contribution.hoursRemaining)
+
+    def remove(self,project:'Project')->None:
+        """
+        remove a project from the series
+        """
+        contribution=self.members.pop(project,None)
+        if contribution is None:
+            return
+        self._apply(contribution,-1)
+        self._maxFinishHours=None
+        if contribution.hoursRemaining>=(self._maxHoursRemaining or 0):
+            self._maxHoursRemaining=None # work it out again when needed
+
+    def update(self,project:'Project')->None:
+        """
+        a member project has changed, so adjust the totals
+        """
+        old=self.members.get(project)
+        if old is None:
+            self.add(project)
+            return
+        new=Contribution.of(project)
+        self.members[project]=new
+        self._apply(old,-1)
+        self._apply(new,1)
+        if self._maxHoursRemaining is not None:
+            if new.hoursRemaining>=self._maxHoursRemaining:
+                self._maxHoursRemaining=new.hoursRemaining
+            elif old.hoursRemaining>=self._maxHoursRemaining:
+                self._maxHoursRemaining=None # work it out again when needed
+
+    @property
+    def maxHoursRemaining(self)->float:
+        """
+        hours remaining on the member that will take the longest
+        """
+        if self._maxHoursRemaining is None:
+            self._maxHoursRemaining=max(
+                (c.hoursRemaining for c in self.members.values()),default=0)
+        return self._maxHoursRemaining
+
+    @property
+    def maxFinishHours(self)->float:
+        """
+        working hours until the last member can be finished, including
+        any time it spends waiting on what it is blocked by
+        (the same hours that go into each member's ETA)
+
+        Only worked out again when the schedule or the members change.
+        """
+        if self.dependencies is None:
+            return self.maxHoursRemaining
+        version=self.dependencies.version
+        if self._maxFinishHours is None or self._maxFinishHours[0]!=version:
+            self._maxFinishHours=(version,max(
+                (self.dependencies.finishHours(p) for p in self.members),
+                default=0))
+        return self._maxFinishHours[1]
+
+    @property
+    def latestETA(self)->datetime.datetime:
+        """
+        when the last member of the series is expected to be done
+        (agrees with the latest of the members' own ETAs)
+        """
+        hours=self.maxFinishHours/self.settings.workingHoursPerDayPerBook
+        return datetime.datetime.now()+datetime.timedelta(hours=hours)
+
+    @property
+    def wordPercent(self)->float:
+        """
+        how much of the series' target wordcount has been written
+        """
+        if not self.targetWords:
+            return 0
+        return self.currentWords/self.targetWords
+
+    def toDict(self)->typing.Dict[str,typing.Any]:
+        """
+        the rolled-up totals as a dict
+        """
+        return {
+            'series':self.name,
+            'projects':len(self.members),
+            'currentWords':self.currentWords,
+            'targetWords':self.targetWords,
+            'totalHoursRemaining':self.totalHoursRemaining,
+            'latestETA':self.latestETA,
+            'blockedCount':self.blockedCount}
+
+    def __len__(self)->int:
+        return len(self.members)
+
+    def __iter__(self)->typing.Iterator['Project']:
+        return iter(self.members)
+
+    def __repr__(self)->str:
+        return '\n'.join(k+'='+str(v) for k,v in self.toDict().items())
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  series.py [options]')
+        print('Options:')
+        print('   NONE')
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
@@ -5,7 +5,28 @@ Juggle info about settings
 """
 import typing
 import os
-from paths import URLCompatible, asUrl
+from .profiling import timed
+if typing.TYPE_CHECKING:
+    from paths import URLCompatible
+
+
+# the file extensions of writing programs, in order of preference
+WRITING_FILE_EXTENSIONS:typing.Tuple[str,...]=(
+    'msk','celtx','odt','doc','docx')
+
+# the extensions that belong to a given writingApp setting
+WRITING_APP_EXTENSIONS:typing.Dict[str,typing.Tuple[str,...]]={
+    'manuskript':('msk',),
+    'celtx':('celtx',),
+    'libreoffice':('odt',),
+    'openoffice':('odt',),
+    'word':('docx','doc'),
+    'msword':('docx','doc'),
+    }
+
+# folders that are big and never contain a manuscript
+DEFAULT_SCAN_IGNORE:str=\
+    '.*/;__pycache__/;*backup*/;images/;pictures/;research/'
 
 
 class Settings:
@@ -16,35 +37,67 @@ class Settings:
     SAVE_FIELDS:typing.List[str]=[
         'workingHoursPerDayPerBook','workingDaysPerWeek','targetWordcount',
         'workingHoursPerDay','simultaneousBooks','projectsDirectory',
-        'writingApp']
+        'writingApp','scanIgnore','scanMaxDepth']
     FIELD_FORMAT:typing.List[type]=[
         float,float,float,
-        float,float,str,str]
+        float,float,str,str,str,int]
 
-    def __init__(self):
-        # TODO: the default only works for windows
-        self.projectsDirectory=os.environ['USERPROFILE']+os.sep+'Documents'
-        self.loadSettings()
+    def __init__(self,location:'URLCompatible'='settings.ini'):
+        self.location:'URLCompatible'=location
+        self.writingApp:str=''
+        # ;-separated gitignore-style patterns of things not to scan
+        # (more can go in a .dashboardignore file in projectsDirectory)
+        self.scanIgnore:str=DEFAULT_SCAN_IGNORE
+        # how many folders deep to look for projects
+        # (1=only directly inside projectsDirectory, 2=also in series, etc
+        # and anything less than 1 is an error)
+        self.scanMaxDepth:int=2
+        self._writingFileExtensions:typing.Tuple[
+            str,typing.Dict[str,int]]=None
+        self.projectsDirectory=os.environ.get('USERPROFILE',
+            os.path.expanduser('~'))+os.sep+'Documents'
+        self.loadSettings(location)
+
+    @property
+    def writingFileExtensions(self)->typing.Dict[str,int]:
+        """
+        {extension:priority} of files that can be a project's manuscript,
+        lowest priority number being the most preferred
+
+        Anything belonging to the writingApp comes first.
+        """
+        app=(self.writingApp or '').strip().lower()
+        if self._writingFileExtensions is None \
+            or self._writingFileExtensions[0]!=app: # noqa: E129
+            #
+            preferred=WRITING_APP_EXTENSIONS.get(app,())
+            order=list(preferred)+[ext for ext in WRITING_FILE_EXTENSIONS
+                if ext not in preferred]
+            self._writingFileExtensions=(
+                app,{ext:i for i,ext in enumerate(order)})
+        return self._writingFileExtensions[1]
 
-    def loadSettings(self,location:URLCompatible='settings.ini')->None:
+    @timed()
+    def loadSettings(self,location:'URLCompatible'='settings.ini')->None:
         """
         TODO: data should be able to live in
         a spreadsheet, google doc, whatever
         """
+        from paths import asUrl # deferred so that importing is cheap
         self.settings=[]
-        for line in asUrl(location).read():
+        for line in asUrl(location).read().split('\n'):
             line=line.split('=',1)
             if len(line)>1:
                 k=line[0].strip()
                 v=line[1].strip()
                 try:
                     idx=self.SAVE_FIELDS.index(k)
-                except AttributeError:
+                except ValueError:
                     continue
                 v=self.FIELD_FORMAT[idx](v)
                 setattr(self,k,v)
 
-    def saveSettings(self,location:URLCompatible='settings.ini')->None:
+    def saveSettings(self,location:'URLCompatible'='settings.ini')->None:
         """
         TODO: data should be able to live in
         a spreadsheet, google doc, whatever
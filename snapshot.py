@@ -0,0 +1,129 @@
+#!/usr/bin/env
+# -*- coding: utf-8 -*-
+"""
+Precomputed results that can be served without loading anything
+
+A snapshot remembers a version stamp of the files it was computed
+from, so it can tell all by itself whether it is still any good.
+"""
+import typing
+import os
+import json
+import datetime
+
+
+class Snapshot:
+    """
+    A precomputed result that stays valid for as long as
+    the files it was computed from do not change
+    """
+
+    def __init__(self,
+        location:str,
+        inputs:typing.Iterable[str]):
+        #
+        self.location:str=location
+        self.inputs:typing.List[str]=list(inputs)
+
+    def stamp(self)->str:
+        """
+        A version stamp of all the input files
+
+        Costs one stat() per input file and nothing else.
+        Includes today's date because things like ETA and daysAhead
+        change as time goes by, even when the files do not.
+        """
+        ret=[datetime.date.today().isoformat()]
+        for filename in self.inputs:
+            try:
+                st=os.stat(filename)
+                ret.append(f'{filename}:{st.st_mtime_ns}:{st.st_size}')
+            except OSError:
+                ret.append(f'{filename}:missing')
+        return ';'.join(ret)
+
+    def peek(self)->typing.Tuple[
+        typing.Optional[typing.Dict[str,typing.Any]],bool]:
+        """
+        Load the snapshot data, even if it is out of date
+
+        Useful for showing something right away while the real
+        thing is being worked out.
+
+        returns (data,upToDate) where data is None if there is no snapshot
+        """
+        try:
+            with open(self.location,'r',encoding='utf-8') as f:
+                snap=json.load(f)
+        except (OSError,ValueError):
+            return None,False
+        if not isinstance(snap,dict):
+            return None,False
+        return snap.get('data'),snap.get('stamp')==self.stamp()
+
+    def load(self)->typing.Optional[typing.Dict[str,typing.Any]]:
+        """
+        Load the snapshot data
+
+        returns None if there is no snapshot or if it is out of date
+        """
+        data,upToDate=self.peek()
+        if not upToDate:
+            return None
+        return data
+
+    def save(self,data:typing.Dict[str,typing.Any])->None:
+        """
+        Save the snapshot data, stamped with the current
+        versions of the input files
+
+        Failing to save is not an error, we simply won't have a snapshot.
+        """
+        snap={'stamp':self.stamp(),'data':data}
+        tmp=self.location+'.tmp'
+        try:
+            with open(tmp,'w',encoding='utf-8') as f:
+                json.dump(snap,f)
+            os.replace(tmp,self.location)
+        except OSError:
+            pass
+
+    def invalidate(self)->None:
+        """
+        Throw away the snapshot
+        """
+        try:
+            os.remove(self.location)
+        except OSError:
+            pass
+
+
+def cmdline(args:typing.Iterable[str])->int:
+    """
+    Run the command line
+
+    :param args: command line arguments (WITHOUT the filename)
+    """
+    printhelp=False
+    if not args:
+        printhelp=True
+    else:
+        for arg in args:
+            if arg.startswith('-'):
+                kv=[a.strip() for a in arg.split('=',1)]
+                if kv[0] in ['-h','--help']:
+                    printhelp=True
+                else:
+                    print('ERR: unknown argument "'+kv[0]+'"')
+            else:
+                print('ERR: unknown argument "'+arg+'"')
+    if printhelp:
+        print('Usage:')
+        print('  snapshot.py [options]')
+        print('Options:')
+        print('   NONE')
+
+
+if __name__=='__main__':
+    import sys
+    cmdline(sys.argv[1:])
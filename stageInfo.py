@@ -4,8 +4,10 @@
 Juggle info about stage info
 """
 import typing
-from paths import URLCompatible, asURL
 from .settings import Settings
+from .profiling import timed
+if typing.TYPE_CHECKING:
+    from paths import URLCompatible
 
 
 class StageInfo:
@@ -38,18 +40,24 @@ class StageInfos:
     A collection of StageInfo items
     """
 
-    def __init__(self,settings:Settings):
+    def __init__(self,
+        settings:Settings,
+        location:'URLCompatible'='stageInfo.csv'):
+        #
         self.settings:Settings=settings
-        self.loadStageInfos()
+        self.location:'URLCompatible'=location
+        self.loadStageInfos(location)
 
+    @timed()
     def loadStageInfos(self,
-        location:URLCompatible='stageInfo.csv',
+        location:'URLCompatible'='stageInfo.csv',
         split_char:str=','
         )->None:
         """
         TODO: data should be able to live in
         a spreadsheet, google doc, whatever
         """
+        from paths import asURL # deferred so that importing is cheap
         self.stageInfos=[]
         header:str=None
         data=asURL(location).read().split('\n')
@@ -65,7 +73,7 @@ class StageInfos:
                         h=h.strip().replace(' ','').replace(r'%','Percent')
                         try:
                             idx=StageInfo.SAVE_FIELDS.index(h)
-                        except AttributeError:
+                        except ValueError:
                             print('Skipping column "'+h+'"')
                             header.append(None)
                             fmts.append(None)
@@ -90,7 +98,7 @@ class StageInfos:
             lineNo+=1
 
     def saveStageInfos(self,
-        location:URLCompatible='stageInfo.csv',
+        location:'URLCompatible'='stageInfo.csv',
         split_char:str=','
         )->None:
         """
@@ -4,7 +4,8 @@
 This module is for creating ui representational access to backend data
 """
 import typing
-from paths import URLCompatible, asURL
+if typing.TYPE_CHECKING:
+    from paths import URLCompatible
 
 
 class UIRepresentation:
@@ -85,10 +86,11 @@ class UIRepresentation:
             self._uiTemplate='\n'.join(self._uiTemplate)
         return self._uiTemplate
 
-    def loadUiTemplate(self,path:URLCompatible)->None:
+    def loadUiTemplate(self,path:'URLCompatible')->None:
         """
         load the template
         """
+        from paths import asURL # deferred so that importing is cheap
         self._uiTemplate=asURL(path).read()
 
     def getHtmlControl(self)->str:
@@ -98,6 +100,8 @@ class UIRepresentation:
         self.EVERYTHING[self.guid]=self
         data=self.uiTemplate.replace('[[id]]',self.guid)
         for k,v in self.__dict__.items():
+            if k[0]=='_': # never in a template, and can be costly to str()
+                continue
             k=f'[[{k}]]'
             data=data.replace(k,str(v))
         return data
@@ -2,74 +2,585 @@
 # -*- coding: utf-8 -*-
 """
 This program allows you to monitor several writing projects all at once.
+
+Startup is kept lazy on purpose, since this gets called from shell
+prompts and status bars many times a day.  Nothing heavy (htmlui, paths,
+the data files themselves) is touched until a command actually needs it.
 """
 import typing
 import os
-import htmlui
-from WritersDashboard.settings import Settings
-from WritersDashboard.stageInfo import StageInfos
-from WritersDashboard.projects import Projects
+from WritersDashboard import profiling
+from WritersDashboard.profiling import timed
+if typing.TYPE_CHECKING:
+    import htmlui
+    from WritersDashboard.settings import Settings
+    from WritersDashboard.stageInfo import StageInfos
+    from WritersDashboard.projects import Project, Projects
+    from WritersDashboard.snapshot import Snapshot
+    from WritersDashboard.daemon import DaemonClient
+    from WritersDashboard.asyncBridge import AsyncBridge
+
+
+# how many project cards the ui shows at a time
+PAGE_SIZE:int=60
 
 
 class Dashboard:
     """
     This program allows you to monitor several writing projects all at once.
+
+    The settings, stages and projects are only loaded when first used.
     """
 
-    def __init__(self):
-        self.settings:Settings=Settings()
-        self.stageInfo:StageInfos=StageInfos(self.settings)
-        self.projects:Projects=Projects(self.settings,self.stageInfo)
+    def __init__(self,
+        settingsLocation:str='settings.ini',
+        stageInfoLocation:str='stageInfo.csv',
+        projectsLocation:str='projects.csv'):
+        #
+        self.settingsLocation:str=settingsLocation
+        self.stageInfoLocation:str=stageInfoLocation
+        self.projectsLocation:str=projectsLocation
+        self._settings:typing.Optional['Settings']=None
+        self._stageInfo:typing.Optional['StageInfos']=None
+        self._projects:typing.Optional['Projects']=None
+        # [{'key':..,'guid':..,'html':..}] of the cards currently shown
+        self._uiCards:typing.Optional[typing.List[typing.Dict[str,str]]]=None
+        # {project:html} of cards rendered since the project last changed
+        self._fragments:typing.Dict['Project',str]={}
+        # (query,[matching projects]) of the last view asked for
+        self._view:typing.Optional[typing.Tuple[str,typing.List['Project']]]=None # noqa: E501 # pylint: disable=line-too-long
+        self.bridge:typing.Optional['AsyncBridge']=None
+
+    @property
+    def settings(self)->'Settings':
+        """
+        the settings (loaded on first use)
+        """
+        if self._settings is None:
+            from WritersDashboard.settings import Settings
+            self._settings=Settings(self.settingsLocation)
+        return self._settings
+
+    @property
+    def stageInfo(self)->'StageInfos':
+        """
+        the stage information (loaded on first use)
+        """
+        if self._stageInfo is None:
+            from WritersDashboard.stageInfo import StageInfos
+            self._stageInfo=StageInfos(self.settings,self.stageInfoLocation)
+        return self._stageInfo
+
+    @property
+    def projects(self)->'Projects':
+        """
+        all of the projects (loaded on first use)
+        """
+        if self._projects is None:
+            from WritersDashboard.projects import Projects
+            self._projects=Projects(
+                self.settings,self.stageInfo,self.projectsLocation)
+            self._projects.changeListeners.append(self._projectsChanged)
+        return self._projects
+
+    @property
+    def loaded(self)->bool:
+        """
+        have the projects been loaded yet?
+        """
+        return self._projects is not None
+
+    def reload(self)->None:
+        """
+        throw away everything that is loaded, along with anything
+        worked out from it, so that it will be loaded fresh upon next use
+
+        (the cards currently shown are kept, so the ui can still be
+        reconciled against whatever gets loaded next)
+        """
+        self._settings=None
+        self._stageInfo=None
+        self._projects=None
+        self._fragments.clear()
+        self._view=None
+
+    @property
+    def inputFiles(self)->typing.List[str]:
+        """
+        all of the files that the computed dashboard depends upon
+        """
+        return [
+            self.settingsLocation,self.stageInfoLocation,self.projectsLocation]
+
+    @property
+    def topSnapshot(self)->'Snapshot':
+        """
+        precomputed --top results that stay good until an input file changes
+        """
+        from WritersDashboard.snapshot import Snapshot
+        location=os.path.join(
+            os.path.dirname(self.projectsLocation),'topSnapshot.json')
+        return Snapshot(location,self.inputFiles)
+
+    @property
+    def uiSnapshot(self)->'Snapshot':
+        """
+        the last rendered ui, so that it can be shown again
+        before anything is loaded
+        """
+        from WritersDashboard.snapshot import Snapshot
+        location=os.path.join(
+            os.path.dirname(self.projectsLocation),'uiSnapshot.json')
+        return Snapshot(location,self.inputFiles)
+
+    @property
+    def socketLocation(self)->str:
+        """
+        where the dashboard daemon listens, if it is running
+        """
+        return os.path.join(
+            os.path.dirname(self.projectsLocation),'writersDashboard.sock')
+
+    def formatTop(self,projects:typing.Iterable['Project'])->typing.List[str]:
+        """
+        format projects as lines of a simple todo list
+        """
+        lines=[]
+        for p in projects:
+            lines.append(' '.join((
+                str(p.title),
+                str(p.currentWords)+'/'+str(p.targetWords),
+                str(p.blockedBy if p.blockedBy else p.stageGoal))))
+        return lines
+
+    def dependencyLines(self)->typing.List[str]:
+        """
+        describe what each blocked project is waiting on as printable lines
+        """
+        graph=self.projects.dependencies
+        lines=[]
+        for p in graph.topologicalOrder():
+            if not graph.blockers[p] and p not in graph.outsideBlockers:
+                continue
+            path=' -> '.join(str(q.title) for q in graph.criticalPath(p))
+            line=f'{p.title}: waits {round(p.upstreamHours)}h ({path})'
+            if p in graph.outsideBlockers:
+                line+=' + '+', '.join(graph.outsideBlockers[p])
+            lines.append(line)
+        cycle=graph.cycles()
+        if cycle:
+            titles=', '.join(str(p.title) for p in cycle)
+            lines.append('ERR: these are blocked by each other in a circle: '+titles) # noqa: E501 # pylint: disable=line-too-long
+        return lines
+
+    def topScored(self,n:int=4)->typing.List[typing.Tuple[float,str]]:
+        """
+        Get the --top todo list as (score,line) pairs, most urgent
+        (lowest score) first, so lists from several catalogs can be merged
+
+        Will use the precomputed snapshot if it is up to date,
+        in which case nothing at all gets loaded.
+        """
+        key='top'+str(n)
+        snapshot=self.topSnapshot
+        data=snapshot.load()
+        if data is not None and key in data:
+            return [tuple(item) for item in data[key]]
+        projects=self.projects.top(n)
+        scored=list(zip(
+            [p.priority*10+p.daysAhead for p in projects],
+            self.formatTop(projects)))
+        if data is None:
+            data={}
+        data[key]=scored
+        snapshot.save(data)
+        return scored
+
+    def topLines(self,n:int=4)->typing.List[str]:
+        """
+        Get the --top todo list as printable lines
+
+        Will use the precomputed snapshot if it is up to date,
+        in which case nothing at all gets loaded.
+        """
+        return [line for _,line in self.topScored(n)]
 
     def __repr__(self)->str:
         return str(self.projects)
 
-    def getHtmlControl(self)->htmlui.Javascript:
+    def _cardKey(self,project:'Project')->str:
+        """
+        what identifies a project's card from one run to the next
+        """
+        makeComparable=self.projects._makeComparable # pylint: disable=protected-access # noqa: E501
+        return makeComparable(str(project.title))+'|'\
+            +makeComparable(str(project.series))
+
+    def _cardHtml(self,project:'Project')->str:
+        """
+        the rendered card for a project
+
+        Cards are kept until the project changes, so scrolling back
+        and forth doesn't render anything twice.
+        """
+        html=self._fragments.get(project)
+        if html is None:
+            html=project.getHtmlControl()
+            self._fragments[project]=html
+        return html
+
+    def _projectsChanged(self,
+        changes:typing.Optional[typing.Dict['Project',typing.Dict[str,typing.Any]]] # noqa: E501 # pylint: disable=line-too-long
+        )->None:
+        """
+        called by Projects whenever projects change
+        (changes is None if everything was reloaded)
+        """
+        if changes is None:
+            self._fragments.clear()
+        else:
+            for project in changes:
+                self._fragments.pop(project,None)
+        self._view=None
+
+    def view(self,query:str='')->typing.List['Project']:
+        """
+        the projects matching a query (all of them if the query is empty)
+
+        The last query asked for is remembered until something changes,
+        since scrolling asks for the same one over and over.  (No query
+        is simply the projects themselves, so asking for that, as the
+        first page and the uiSnapshot do, doesn't forget the last query.)
+        """
+        if not query:
+            return self.projects.projects
+        if self._view is None or self._view[0]!=query:
+            self._view=(query,self.projects.query(query))
+        return self._view[1]
+
+    def projectCount(self,query:str='')->int:
+        """
+        how many projects match a query
+        """
+        return len(self.view(query))
+
+    @timed()
+    def renderCards(self,
+        oldCards:typing.Optional[typing.List[typing.Dict[str,str]]]=None,
+        count:int=PAGE_SIZE
+        )->typing.List[typing.Dict[str,str]]:
+        """
+        render the cards for the first count projects, and save them
+        to the uiSnapshot
+
+        Projects get back the guids they had in oldCards (matched by
+        title and series) so that cards already on screen stay valid.
+
+        returns [{'key':..,'guid':..,'html':..}]
+        """
+        guids:typing.Dict[str,str]={}
+        for card in oldCards or ():
+            guids.setdefault(card['key'],card['guid'])
+        projects=self.view()
+        cards=[]
+        for project in projects[0:count]:
+            key=self._cardKey(project)
+            guid=guids.pop(key,None)
+            if guid is not None and project._guid is None: # pylint: disable=protected-access # noqa: E501
+                project.guid=guid
+            cards.append({
+                'key':key,
+                'guid':project.guid,
+                'html':self._cardHtml(project)})
+        self.uiSnapshot.save({'cards':cards,'total':len(projects)})
+        self._uiCards=cards
+        return cards
+
+    @timed()
+    def getHtmlControl(self,count:int=PAGE_SIZE)->'htmlui.Javascript':
         """
         get an html control for the dashboard
+
+        Only the first count cards are rendered, the page asks for
+        the rest with getHtmlRange() as it is scrolled.
+        """
+        import htmlui
+        import json
+        cards=self.renderCards(self._uiCards,count)
+        html='\n'.join(card['html'] for card in cards)
+        return htmlui.Javascript(
+            f'showCards(0,{len(self.view())},{json.dumps(html)});')
+
+    @timed()
+    def getHtmlRange(self,
+        start:int,
+        count:int=PAGE_SIZE,
+        query:str=''
+        )->'htmlui.Javascript':
+        """
+        get the cards for a range of the projects matching a query
+        (to fill in whatever part of the list is scrolled into view)
+        """
+        import htmlui
+        import json
+        projects=self.view(query)
+        start=max(0,min(int(start),len(projects)))
+        html='\n'.join(self._cardHtml(project)
+            for project in projects[start:start+int(count)])
+        return htmlui.Javascript(
+            f'showCards({start},{len(projects)},{json.dumps(html)});')
+
+    def cachedHtmlControl(self)->typing.Optional['htmlui.Javascript']:
         """
+        get the html control as it was last rendered, without
+        loading anything (it may well be out of date)
+
+        returns None if there is nothing saved
+        """
+        import htmlui
+        import json
+        data,_=self.uiSnapshot.peek()
+        if not data or not isinstance(data.get('cards'),list):
+            return None
+        self._uiCards=data['cards']
+        html='\n'.join(card['html'] for card in self._uiCards)
+        total=int(data.get('total',len(self._uiCards)))
+        return htmlui.Javascript(f'showCards(0,{total},{json.dumps(html)});')
+
+    @timed()
+    def reconcileHtmlControl(self)->'htmlui.Javascript':
+        """
+        bring the cards shown by cachedHtmlControl() up to date
+
+        Only cards that were added, removed or changed are touched
+        (and only if the page is still showing the top of the whole,
+        unfiltered list).
+        """
+        import htmlui
+        import json
+        oldCards={card['guid']:card for card in self._uiCards or ()}
+        cards=self.renderCards(self._uiCards,len(self._uiCards or ()) or PAGE_SIZE) # noqa: E501 # pylint: disable=line-too-long
         code=[]
-        # add projects
-        for project in self.projects:
-            code.append(project.getHtmlControl())
-        code='\n'.join(code)
-        code=htmlui.setElementContents('app',code)
-        return htmlui.Javascript(code)
+        newGuids={card['guid'] for card in cards}
+        for guid in oldCards:
+            if guid not in newGuids:
+                code.append(f'removeCard({json.dumps(guid)});')
+        previous='null'
+        for card in cards:
+            guid=json.dumps(card['guid'])
+            html=json.dumps(card['html'])
+            old=oldCards.get(card['guid'])
+            if old is None:
+                code.append(f'insertCard({previous},{html});')
+            elif old['html']!=card['html']:
+                code.append(f'replaceCard({guid},{html});')
+            previous=guid
+        code.append(f'showTotal({len(self.view())});')
+        return htmlui.Javascript(
+            'if(cardStart==0 && cardQuery==""){\n'+'\n'.join(code)+'\n}')
 
-    def setClassValue(self,guid:str,k:str,v:typing.Any)->htmlui.Javascript:
+    def setClassValue(self,
+        guid:str,
+        k:str,
+        v:typing.Any
+        )->'htmlui.Javascript':
         """
         Set a value on the class pointed to by guid
+        (projects are saved afterwards)
         """
-        import uiRepresentation
-        print(guid,k,v)
-        obj=uiRepresentation.UIRepresentation.EVERYTHING[guid]
-        setattr(obj,k,v)
+        import htmlui
+        from WritersDashboard.uiRepresentation import UIRepresentation
+        from WritersDashboard.projects import Project
         print(guid,k,v)
+        obj=UIRepresentation.EVERYTHING[guid]
+        if isinstance(obj,Project) and k in obj.SAVE_FIELDS:
+            with self.projects.batch() as batch:
+                batch.set(obj,k,v)
+        else:
+            setattr(obj,k,v)
         return htmlui.Javascript()
 
-    def launchUI(self)->None:
+    def scanProjectsHtml(self)->'htmlui.Javascript':
+        """
+        scan for new/missing/linkable projects and show the results
+        """
+        import htmlui
+        missingProjects,newProjects,suggestedLinks=\
+            self.projects.scanProjects()
+        code=[]
+        for heading,items in (
+            ('Missing',[(p,p.documentLocation) for p in missingProjects]),
+            ('New',[(p,p.documentLocation) for p in newProjects]),
+            ('Suggested Links',suggestedLinks)): # noqa: E129
+            #
+            code.append(f'<h3>{heading} ({len(items)})</h3><ul>')
+            for p,location in items:
+                code.append(f'<li>{p.title} : {p.series} : {location}</li>')
+            code.append('</ul>')
+        duplicates=self.projects.lastScanDuplicates
+        code.append(f'<h3>Duplicates ({len(duplicates)})</h3><ul>')
+        for location,copies in duplicates.items():
+            code.append(f'<li>{location} : {" : ".join(copies)}</li>')
+        code.append('</ul>')
+        code=htmlui.setElementContents('scanResults','\n'.join(code))
+        return htmlui.Javascript(code)
+
+    async def getHtmlControlAsync(self)->'htmlui.Javascript':
+        """
+        same as getHtmlControl(), but the loading and rendering
+        happen on the background worker
+
+        If the ui has been shown before, that is shown again right away,
+        and the cards that have changed since are patched once
+        everything is loaded.
+        """
+        cached=await self.bridge.inBackground(self.cachedHtmlControl)
+        if cached is None:
+            return await self.bridge.inBackground(self.getHtmlControl)
+        self.bridge.deliverLater(
+            self.bridge.inBackground(self.reconcileHtmlControl))
+        return cached
+
+    async def setClassValueAsync(self,
+        guid:str,
+        k:str,
+        v:typing.Any
+        )->'htmlui.Javascript':
+        """
+        same as setClassValue(), but the save happens
+        on the background worker
+        """
+        return await self.bridge.inBackground(self.setClassValue,guid,k,v)
+
+    async def getHtmlRangeAsync(self,
+        start:int,
+        count:int=PAGE_SIZE,
+        query:str=''
+        )->'htmlui.Javascript':
+        """
+        same as getHtmlRange(), but the rendering happens
+        on the background worker
+        """
+        return await self.bridge.inBackground(
+            self.getHtmlRange,start,count,query)
+
+    async def scanProjectsAsync(self)->'htmlui.Javascript':
+        """
+        same as scanProjectsHtml(), but the scan happens
+        on the background worker
+        """
+        return await self.bridge.inBackground(self.scanProjectsHtml)
+
+    def launchUI(self)->int:
         """
         Launches the UI
-        blocks forever
-        shuts down program when done
+        blocks until the ui is closed
+
+        Slow handlers run on a background worker so the ui
+        stays responsive, see asyncBridge.
+
+        returns the ui's exit code
         """
+        import htmlui
+        from WritersDashboard.asyncBridge import AsyncBridge
         ui=htmlui.HtmlUI()
-        ui.publish(self.getHtmlControl)
-        ui.publish(self.setClassValue)
-        required=['webkit']
-        exitCode=ui.run('WritersDashboard.html',required=required)
-        # os._exit() is used to take down all threads
-        # (normal exit() would block forever!)
-        os._exit(exitCode) # pylint: disable=protected-access
+        self.bridge=AsyncBridge()
+        self.bridge.start()
+        try:
+            self.bridge.publish(ui,self.getHtmlControlAsync,'getHtmlControl')
+            self.bridge.publish(ui,self.setClassValueAsync,'setClassValue')
+            self.bridge.publish(ui,self.getHtmlRangeAsync,'getHtmlRange')
+            self.bridge.publish(ui,self.scanProjectsAsync,'scanProjects')
+            self.bridge.publish(ui,self.bridge.pollPending)
+            required=['webkit']
+            exitCode=ui.run('WritersDashboard.html',required=required)
+        finally:
+            self.bridge.shutdown()
+            self.bridge=None
+        return exitCode
+
+
+def _parseSetArg(arg:str)->typing.Tuple[
+    typing.Dict[str,str],typing.Dict[str,str]]:
+    """
+    parse the value of a --set argument into (filters,changes)
+
+    The format is
+        field=value[,field=value...] where field=value[,field=value...]
+    """
+    changes,_,filters=arg.partition(' where ')
+    if not filters.strip():
+        raise Exception('--set needs a "where" to say which projects to change') # noqa: E501 # pylint: disable=line-too-long
+
+    def kvs(s:str)->typing.Dict[str,str]:
+        ret={}
+        for item in s.split(','):
+            k,eq,v=item.partition('=')
+            if not eq:
+                raise Exception('Expected field=value but got "'+item+'"')
+            ret[k.strip()]=v.strip()
+        return ret
+
+    return kvs(filters),kvs(changes)
+
+
+def _daemonCall(
+    client:'DaemonClient',
+    cmd:str,
+    **args
+    )->typing.Tuple[bool,typing.Any]:
+    """
+    have a running dashboard daemon do the work, if there is one
+
+    returns (True,result) if the daemon answered, else (False,None)
+        (a daemon from an older version that doesn't know the
+        command counts as not having answered)
+    """
+    from WritersDashboard.daemon import UNKNOWN_COMMAND
+    if client.available:
+        try:
+            return True,client.call(cmd,**args)
+        except OSError:
+            client.close() # stale socket file, dead daemon, etc
+        except Exception as e: # pylint: disable=broad-except
+            if not str(e).startswith(UNKNOWN_COMMAND):
+                raise
+    return False,None
 
 
 def cmdline(args:typing.Iterable[str])->int:
     """
     Run the command line
 
+    If a dashboard daemon is running, it is used to answer
+    instead of loading everything ourselves.
+
     :param args: command line arguments (WITHOUT the filename)
     """
+    from WritersDashboard.daemon import DaemonClient
+    profilePrefix=profiling.reportPrefix()
+    catalogsDirectory='catalogs'
+    catalogPattern=None
+    for arg in args:
+        if arg.split('=',1)[0]=='--profile':
+            profiling.enable()
+            profilePrefix=arg.split('=',1)[1] if '=' in arg else None
+        elif arg.split('=',1)[0]=='--catalogs':
+            catalogsDirectory=arg.split('=',1)[1].strip()
+        elif arg.split('=',1)[0]=='--catalog':
+            catalogPattern=arg.split('=',1)[1].strip()
     d=Dashboard()
+    catalogs=None # set when working across several catalogs at once
+    if catalogPattern is not None:
+        from WritersDashboard.catalogs import Catalogs
+        allCatalogs=Catalogs(catalogsDirectory)
+        selected=allCatalogs.select(catalogPattern)
+        if len(selected)==1:
+            d=selected[0].dashboard
+        else:
+            catalogs=allCatalogs
+    client=DaemonClient(d.socketLocation)
+    exitCode=None
     printhelp=False
     if not args:
         printhelp=True
@@ -79,20 +590,36 @@ def cmdline(args:typing.Iterable[str])->int:
                 kv=[a.strip() for a in arg.split('=',1)]
                 if kv[0] in ['-h','--help']:
                     printhelp=True
+                elif kv[0] in ('--profile','--catalog','--catalogs'):
+                    pass # already handled above
+                elif catalogs is not None and kv[0] not in ('--top','--query'): # noqa: E501 # pylint: disable=line-too-long
+                    print('ERR: "'+kv[0]+'" only works on a single catalog')
                 elif kv[0]=='--ui':
-                    d.launchUI()
+                    exitCode=d.launchUI()
+                elif kv[0]=='--daemon':
+                    from WritersDashboard.daemon import DashboardDaemon
+                    DashboardDaemon(d).run()
                 elif kv[0]=='--dump':
-                    print(d)
+                    answered,dump=_daemonCall(client,'dump')
+                    print(dump if answered else d)
+                elif kv[0]=='--export':
+                    from WritersDashboard.export import export
+                    fmt,_,location=(kv[1] if len(kv)>1 else 'ndjson').partition(':') # noqa: E501 # pylint: disable=line-too-long
+                    count=export(d.projects,fmt.strip(),location or None)
+                    if location:
+                        print('Exported',count,'projects to',location)
                 elif kv[0]=='--top':
                     n=4
                     if len(kv)>1:
                         n=int(kv[1])
-                    projs=d.projects.top(n)
-                    for p in projs:
-                        print(p.title,
-                            str(p.currentWords)+'/'+str(p.targetWords),
-                            p.blockedBy if p.blockedBy is not None
-                            else p.stageGoal)
+                    if catalogs is not None:
+                        lines=catalogs.topLines(n,catalogPattern)
+                    else:
+                        answered,lines=_daemonCall(client,'topLines',n=n)
+                        if not answered:
+                            lines=d.topLines(n)
+                    for line in lines:
+                        print(line)
                 elif kv[0]=='--scan':
                     missingProjects,newProjects,suggestedLinks=\
                         d.projects.scanProjects()
@@ -108,23 +635,91 @@ def cmdline(args:typing.Iterable[str])->int:
                     print('----------------')
                     for p,location in suggestedLinks:
                         print(p.title,':',p.series,':',location)
+                    duplicates=d.projects.lastScanDuplicates
+                    print('\nDuplicates',len(duplicates))
+                    print('----------------')
+                    for location,copies in duplicates.items():
+                        print(location,':',' : '.join(copies))
+                elif kv[0]=='--refresh':
+                    changed=d.projects.refreshFromManuscripts()
+                    print('Updated',len(changed),'projects')
+                    for p in changed:
+                        print('  '+str(p.title),
+                            str(p.currentWords)+'/'+str(p.targetWords),
+                            str(round(p.stagePercent*100))+'% of stage '+str(p.stage)) # noqa: E501 # pylint: disable=line-too-long
+                elif kv[0]=='--query':
+                    if catalogs is not None:
+                        lines=catalogs.queryLines(kv[1],catalogPattern)
+                    else:
+                        answered,lines=_daemonCall(client,'queryLines',
+                            query=kv[1])
+                        if not answered:
+                            lines=d.formatTop(d.projects.query(kv[1]))
+                    for line in lines:
+                        print(line)
+                elif kv[0]=='--series':
+                    answered,allSeries=_daemonCall(client,'series')
+                    if not answered:
+                        allSeries=[series.toDict()
+                            for series in d.projects.series.values()]
+                    for series in allSeries:
+                        print(series['series'],
+                            str(series['currentWords'])+'/'+str(series['targetWords']), # noqa: E501 # pylint: disable=line-too-long
+                            str(round(series['totalHoursRemaining']))+'h',
+                            'latest ETA',str(series['latestETA'])[0:10],
+                            str(series['blockedCount'])+' blocked')
+                elif kv[0]=='--deps':
+                    answered,lines=_daemonCall(client,'dependencyLines')
+                    if not answered:
+                        lines=d.dependencyLines()
+                    for line in lines:
+                        print(line)
+                elif kv[0]=='--set':
+                    filters,changes=_parseSetArg(kv[1])
+                    answered,titles=_daemonCall(client,'setWhere',
+                        filters=filters,changes=changes)
+                    if not answered:
+                        titles=[p.title for p in
+                            d.projects.updateWhere(filters,changes)]
+                    print('Changed',len(titles),'projects')
+                    for title in titles:
+                        print('  '+str(title))
                 elif kv[0]=='--open':
-                    p=d.projects.getByName(kv[1]).open()
+                    answered,_=_daemonCall(client,'open',name=kv[1])
+                    if not answered:
+                        d.projects.getByName(kv[1]).open()
                 else:
                     print('ERR: unknown argument "'+kv[0]+'"')
             else:
                 print('ERR: unknown argument "'+arg+'"')
+    client.close()
+    if profiling.enabled():
+        profiling.report(profilePrefix)
     if printhelp:
         print('Usage:')
         print('  writersDashboard.py [options]')
         print('Options:')
         print('   --ui ................. launch the user interface')
+        print('   --profile[=prefix] ... time the slow parts and print a summary (or save prefix.txt and flamegraph-ready prefix.folded)') # noqa: E501 # pylint: disable=line-too-long
+        print('                          (or set the '+profiling.ENV_VAR+' environment variable)') # noqa: E501 # pylint: disable=line-too-long
+        print('   --daemon ............. keep everything loaded and answer other instances over a socket') # noqa: E501 # pylint: disable=line-too-long
+        print('   --catalog=name ....... work on one of several catalogs (a subdirectory of the catalogs directory)') # noqa: E501 # pylint: disable=line-too-long
+        print('                          wildcards or a comma-separated list (eg: --catalog=*) work across catalogs with --top and --query') # noqa: E501 # pylint: disable=line-too-long
+        print('   --catalogs=directory . where the catalogs are (default="catalogs")') # noqa: E501 # pylint: disable=line-too-long
         print('   --dump ............... dump all current projects')
+        print('   --export[=fmt[:file]]  stream all projects with computed values as ndjson (default) or csv to stdout or a file') # noqa: E501 # pylint: disable=line-too-long
         print('   --scan ............... scan the projects location for new/broken/linked projects') # noqa: E501 # pylint: disable=line-too-long
+        print('   --refresh ............ update word counts (and stage progress) from Manuskript files') # noqa: E501 # pylint: disable=line-too-long
         print('   --top[=n] ............ get a quick and simple todo list of n items (default=4)') # noqa: E501 # pylint: disable=line-too-long
         print('   --open=project ....... open the main file associated with a project') # noqa: E501 # pylint: disable=line-too-long
+        print('   --series ............. show rolled-up totals for each series') # noqa: E501 # pylint: disable=line-too-long
+        print('   --deps ............... show what blocked projects are waiting on (the critical path)') # noqa: E501 # pylint: disable=line-too-long
+        print('   --query=query ........ list matching projects, eg: --query="series=Dragons,stage>=3,daysAhead<0,sort=-priority,limit=10"') # noqa: E501 # pylint: disable=line-too-long
+        print('   --set="k=v[,k=v] where k=v[,k=v]" change fields on all matching projects') # noqa: E501 # pylint: disable=line-too-long
+        print('                          eg: --set="activeStatus=shelved where series=Dragons"') # noqa: E501 # pylint: disable=line-too-long
+    return exitCode
 
 
 if __name__=='__main__':
     import sys
-    cmdline(sys.argv[1:])
+    sys.exit(cmdline(sys.argv[1:]))